@@ -17,8 +17,9 @@
 from __future__ import annotations
 import os
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from typing import TYPE_CHECKING, Optional, List, Dict
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator
 
 from explorerscript.source_map import SourceMapPositionMark
 from skytemple_files.common.ppmdu_config.data import Pmd2Data
@@ -100,6 +101,13 @@ class AbstractDebuggerControlContext(ABC):
     def allows_interactive_file_management(self) -> bool:
         """Returns whether or not this context allows the user to load ROMs via the UI"""
 
+    def supports_parallel_rom_loading(self) -> bool:
+        """
+        Returns whether save_rom and load_script_files can be called from worker threads, at the same time,
+        while a ROM is loaded. Otherwise they are only called from the GTK main thread.
+        """
+        return False
+
     @abstractmethod
     def before_quit(self) -> bool:
         """Handles quit requests. If False is returned, the quit is aborted."""
@@ -159,6 +167,18 @@ class AbstractDebuggerControlContext(ABC):
     def load_script_files(self) -> ScriptFiles:
         """Returns the information of the script files inside the ROM."""
 
+    def on_script_added(self, ssb_path: str, mapname: str, scene_type: str, scene_name: str):
+        """
+        Event handler for when an SSB file was added to the ROM. ssb_path is relative to the SCRIPT folder.
+        Contexts that cache the information returned by load_script_files can update it here.
+        """
+
+    def on_script_removed(self, ssb_path: str):
+        """
+        Event handler for when an SSB file was removed from the ROM. ssb_path is relative to the SCRIPT folder.
+        Contexts that cache the information returned by load_script_files can update it here.
+        """
+
     @abstractmethod
     def is_project_loaded(self) -> bool:
         """Returns whether or not a ROM is loaded."""
@@ -173,7 +193,11 @@ class AbstractDebuggerControlContext(ABC):
 
     @abstractmethod
     def get_static_data(self) -> Pmd2Data:
-        """Returns the PPMDU configuration for the currently open ROM."""
+        """
+        Returns the PPMDU configuration for the currently open ROM.
+        Contexts that change entries of its script data while the debugger is open must call
+        ConstantIndex.invalidate with it afterwards, so that the constants offered for completion are updated.
+        """
 
     @abstractmethod
     def get_project_filemanager(self) -> ProjectFileManager:
@@ -183,6 +207,17 @@ class AbstractDebuggerControlContext(ABC):
     def get_ssb(self, filename, ssb_file_manager: SsbFileManager) -> SsbLoadedFile:
         """Returns the SSB with the given filename from the ROM."""
 
+    def get_ssb_and_pin(self, filename, ssb_file_manager: SsbFileManager,
+                        pin: Callable[[SsbLoadedFile], None]) -> SsbLoadedFile:
+        """
+        Like get_ssb, but calls pin with the file before it is returned, so that pin can mark it as in use.
+        Contexts that unload files that are not in use must override this and make sure the file can not be
+        unloaded before pin was called.
+        """
+        loaded_file = self.get_ssb(filename, ssb_file_manager)
+        pin(loaded_file)
+        return loaded_file
+
     @abstractmethod
     def on_script_edit(self, filename):
         """Event handler for when the debugger starts editing the specified script"""
@@ -191,6 +226,15 @@ class AbstractDebuggerControlContext(ABC):
     def save_ssb(self, filename, ssb_model, ssb_file_manager: SsbFileManager):
         """Updates an SSB model in the ROM and then saves the ROM."""
 
+    @contextmanager
+    def deferred_rom_save(self) -> Iterator[None]:
+        """
+        While this context manager is active, contexts may defer writing the ROM in save_ssb, so that
+        multiple SSB files can be saved with a single write. The ROM is written on exit.
+        By default the ROM is written on every call to save_ssb.
+        """
+        yield
+
     @abstractmethod
     def open_scene_editor(self, type_of_scene, filename):
         """
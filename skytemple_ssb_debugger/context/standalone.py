@@ -16,10 +16,13 @@
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 import logging
+import os
 import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
 from threading import Lock
 from typing import Optional, TYPE_CHECKING, Dict, List
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator
 
 import gi
 
@@ -37,28 +40,47 @@ from skytemple_files.common.script_util import ScriptFiles, load_script_files, S
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.common.util import get_rom_folder, get_ppmdu_config_for_rom, Capturable
 from skytemple_ssb_debugger.context.abstract import AbstractDebuggerControlContext, EXPS_KEYWORDS
+from skytemple_ssb_debugger.model.rom_persistence import RomPersistence, repack_state_path
+from skytemple_ssb_debugger.model.script_files_cache import ScriptFilesCache, script_folder_hash
 from skytemple_ssb_debugger.model.ssb_files.file import SsbLoadedFile
 
 if TYPE_CHECKING:
     from skytemple_ssb_debugger.model.ssb_files.file_manager import SsbFileManager
 logger = logging.getLogger(__name__)
-file_load_lock = Lock()
+# Maximum number of loaded SSB files that are kept in memory while not in use.
+MAX_CACHED_SSB_FILES = 64
 
 
 class StandaloneDebuggerControlContext(AbstractDebuggerControlContext):
-    """Context for running the debugger as a standalone application."""
+    """
+    Context for running the debugger as a standalone application.
+    Without a main window (when running headless), errors are only logged.
+    """
 
-    def __init__(self, main_window: Gtk.Window):
+    def __init__(self, main_window: Gtk.Window | None):
         self._rom: NintendoDSRom | None = None
         self._rom_filename: str | None = None
+        self._rom_persistence: RomPersistence | None = None
+        self._deferred_saves = 0
         self._project_fm: ProjectFileManager | None = None
         self._static_data: Pmd2Data | None = None
-        self._open_files: dict[str, SsbLoadedFile] = {}
+        # Loaded SSB files, least recently used first.
+        self._open_files: OrderedDict[str, SsbLoadedFile] = OrderedDict()
+        # Guards _open_files and _file_locks. Only held briefly, never while loading files.
+        self._open_files_lock = Lock()
+        # One lock per file name, held while the file is loaded, so that each file is only loaded once.
+        self._file_locks: dict[str, Lock] = {}
+        # Guards the ROM model and writing the ROM file.
+        self._rom_lock = Lock()
+        self._script_files_hash: str | None = None
         self._main_window = main_window
 
     def allows_interactive_file_management(self) -> bool:
         return True
 
+    def supports_parallel_rom_loading(self) -> bool:
+        return True
+
     def before_quit(self) -> bool:
         return True
 
@@ -82,18 +104,54 @@ class StandaloneDebuggerControlContext(AbstractDebuggerControlContext):
         self._rom = NintendoDSRom.fromFile(filename)
         self._rom_filename = filename
         self._project_fm = ProjectFileManager(filename)
+        self._rom_persistence = RomPersistence(
+            self._rom, filename, repack_state_path(self.get_project_debugger_dir(), filename)
+        )
         self._static_data = get_ppmdu_config_for_rom(self._rom)
-        self._open_files = {}
+        with self._open_files_lock:
+            self._open_files = OrderedDict()
+            self._file_locks = {}
+        self._script_files_hash = None
 
     def get_project_dir(self) -> str:
         assert self._project_fm is not None
         return self._project_fm.dir()
 
     def load_script_files(self) -> ScriptFiles:
+        assert self._rom is not None
+        # May run at the same time as save_rom, see supports_parallel_rom_loading.
+        with self._rom_lock:
+            folder = get_rom_folder(self._rom, SCRIPT_DIR)
+            assert folder is not None
+            self._script_files_hash = script_folder_hash(folder)
+        cache = self._script_files_cache()
+        script_files = cache.load(self._script_files_hash)
+        if script_files is None:
+            script_files = load_script_files(folder)
+            cache.save(self._script_files_hash, script_files)
+        return script_files
+
+    def on_script_added(self, ssb_path: str, mapname: str, scene_type: str, scene_name: str):
+        old_hash, new_hash = self._update_script_files_hash()
+        if old_hash is not None and new_hash is not None:
+            self._script_files_cache().add_script(old_hash, new_hash, ssb_path, mapname, scene_type, scene_name)
+
+    def on_script_removed(self, ssb_path: str):
+        old_hash, new_hash = self._update_script_files_hash()
+        if old_hash is not None and new_hash is not None:
+            self._script_files_cache().remove_script(old_hash, new_hash, ssb_path)
+
+    def _script_files_cache(self) -> ScriptFilesCache:
+        return ScriptFilesCache(os.path.join(
+            self.get_project_debugger_dir(), f'{os.path.basename(self.get_rom_filename())}.script_files.json'
+        ))
+
+    def _update_script_files_hash(self) -> tuple[str | None, str | None]:
         assert self._rom is not None
         folder = get_rom_folder(self._rom, SCRIPT_DIR)
-        assert folder is not None
-        return load_script_files(folder)
+        old_hash = self._script_files_hash
+        self._script_files_hash = script_folder_hash(folder) if folder is not None else None
+        return old_hash, self._script_files_hash
 
     def is_project_loaded(self) -> bool:
         return self._rom is not None
@@ -105,8 +163,21 @@ class StandaloneDebuggerControlContext(AbstractDebuggerControlContext):
 
     def save_rom(self):
         self._check_loaded()
-        assert self._rom_filename is not None and self._rom is not None
-        self._rom.saveToFile(self._rom_filename, updateDeviceCapacity=True)
+        assert self._rom_persistence is not None
+        with self._rom_lock:
+            self._rom_persistence.save_full()
+
+    @contextmanager
+    def deferred_rom_save(self) -> Iterator[None]:
+        with self._rom_lock:
+            self._deferred_saves += 1
+        try:
+            yield
+        finally:
+            with self._rom_lock:
+                self._deferred_saves -= 1
+                if self._deferred_saves == 0 and self._rom_persistence is not None:
+                    self._rom_persistence.flush()
 
     def get_static_data(self) -> Pmd2Data:
         self._check_loaded()
@@ -119,32 +190,95 @@ class StandaloneDebuggerControlContext(AbstractDebuggerControlContext):
         return self._project_fm
 
     def get_ssb(self, filename, ssb_file_manager: SsbFileManager) -> SsbLoadedFile:
+        return self._get_ssb(filename, ssb_file_manager, None)
+
+    def get_ssb_and_pin(self, filename, ssb_file_manager: SsbFileManager,
+                        pin: Callable[[SsbLoadedFile], None]) -> SsbLoadedFile:
+        return self._get_ssb(filename, ssb_file_manager, pin)
+
+    def _get_ssb(self, filename, ssb_file_manager: SsbFileManager,
+                 pin: Callable[[SsbLoadedFile], None] | None) -> SsbLoadedFile:
+        """get_ssb, pin is called with the _open_files_lock held, so the file can not be unloaded before."""
         assert self._project_fm is not None and self._rom is not None
-        with file_load_lock:
+        with self._open_files_lock:
             self._check_loaded()
-            if filename not in self._open_files:
+            loaded_file = self._get_open_file(filename, pin)
+            if loaded_file is not None:
+                return loaded_file
+            file_lock = self._file_locks.setdefault(filename, Lock())
+        # Different files are loaded in parallel. Concurrent requests for the same file wait for the first one.
+        with file_lock:
+            with self._open_files_lock:
+                loaded_file = self._get_open_file(filename, pin)
+                if loaded_file is not None:
+                    return loaded_file
+            with self._rom_lock:
                 try:
                     ssb_bin = self._rom.getFileByName(filename)
                 except ValueError as err:
                     raise FileNotFoundError(str(err)) from err
-                self._open_files[filename] = SsbLoadedFile(
-                    filename, FileType.SSB.deserialize(ssb_bin, self._static_data),
-                    ssb_file_manager, self._project_fm
-                )
-                self._open_files[filename].exps.ssb_hash = ssb_file_manager.hash(ssb_bin)
-            return self._open_files[filename]
+            loaded_file = SsbLoadedFile(
+                filename, FileType.SSB.deserialize(ssb_bin, self._static_data),
+                ssb_file_manager, self._project_fm
+            )
+            loaded_file.exps.ssb_hash = loaded_file.ssb_hash
+            with self._open_files_lock:
+                # If the file was unloaded while waiting for the file lock, it may have been loaded again by a
+                # request that took a new lock. Only one instance of each file must be in use.
+                existing_file = self._get_open_file(filename, pin)
+                if existing_file is not None:
+                    return existing_file
+                self._open_files[filename] = loaded_file
+                if pin is not None:
+                    pin(loaded_file)
+                self._evict_unused_files(filename)
+            return loaded_file
+
+    def _get_open_file(self, filename: str,
+                       pin: Callable[[SsbLoadedFile], None] | None = None) -> SsbLoadedFile | None:
+        """
+        Returns the file, if it is loaded, after calling pin with it (if given).
+        Must be called with the _open_files_lock held.
+        """
+        loaded_file = self._open_files.get(filename)
+        if loaded_file is not None:
+            self._open_files.move_to_end(filename)
+            if pin is not None:
+                pin(loaded_file)
+        return loaded_file
+
+    def _evict_unused_files(self, keep: str):
+        """
+        Removes the least recently used files that are not in use, until at most MAX_CACHED_SSB_FILES files are
+        loaded. Files that are in use and the file keep are never removed.
+        Must be called with the _open_files_lock held.
+        """
+        to_remove = len(self._open_files) - MAX_CACHED_SSB_FILES
+        if to_remove <= 0:
+            return
+        for filename, loaded_file in list(self._open_files.items()):
+            if to_remove <= 0:
+                break
+            if filename != keep and not loaded_file.in_use:
+                logger.debug(f"{filename}: Unloading, not used recently.")
+                del self._open_files[filename]
+                self._file_locks.pop(filename, None)
+                to_remove -= 1
 
     def on_script_edit(self, filename):
         pass
 
     def save_ssb(self, filename, ssb_model, ssb_file_manager: SsbFileManager):
         assert self._rom is not None
-        with file_load_lock:
-            self._check_loaded()
-            self._rom.setFileByName(
-                filename, FileType.SSB.serialize(ssb_model, self._static_data)
-            )
-            self.save_rom()
+        self._check_loaded()
+        ssb_bin = FileType.SSB.serialize(ssb_model, self._static_data)
+        with self._rom_lock:
+            assert self._rom_persistence is not None
+            self._rom.setFileByName(filename, ssb_bin)
+            # Only the changed file is written (if it still fits) and only once all deferred saves are done.
+            self._rom_persistence.mark_dirty(filename)
+            if self._deferred_saves == 0:
+                self._rom_persistence.flush()
 
     def _check_loaded(self):
         if self._rom is None:
@@ -183,6 +317,8 @@ class StandaloneDebuggerControlContext(AbstractDebuggerControlContext):
             *, context: dict[str, Capturable] | None = None
     ):
         logger.error(error_message, exc_info=exc_info)
+        if self._main_window is None:
+            return
         exc_info_str = ''
         if exc_info:
             exc_info_str = '\n' + ''.join(traceback.format_exception(exc_info[0], value=exc_info[1], tb=exc_info[2]))
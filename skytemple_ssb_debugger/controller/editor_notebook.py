@@ -36,7 +36,7 @@ from skytemple_files.common.i18n_util import f, _
 
 
 if TYPE_CHECKING:
-    from skytemple_ssb_debugger.main import MainController
+    from skytemple_ssb_debugger.controller.main import MainController
 
 
 class EditorNotebookController:
@@ -28,7 +28,7 @@ from skytemple_ssb_debugger.model.ground_engine_state import TALK_HANGER_OFFSET
 from skytemple_ssb_debugger.model.script_runtime_struct import ScriptRuntimeStruct
 from skytemple_files.common.i18n_util import _
 
-from skytemple_ssb_debugger.ui_util import builder_get_assert, create_tree_view_column
+from skytemple_ssb_debugger.ui_util import builder_get_assert, create_tree_view_column, resizable
 
 GE_FILE_STORE_SCRIPT = _('Script')
 
@@ -39,11 +39,6 @@ from gi.repository import Gtk
 from skytemple_ssb_debugger.controller.debugger import DebuggerController
 
 
-def resizable(column):
-    column.set_resizable(True)
-    return column
-
-
 class GroundStateController:
     def __init__(self, debugger_controller: DebuggerController, builder: Gtk.Builder):
         self.debugger = debugger_controller
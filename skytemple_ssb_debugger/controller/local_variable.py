@@ -24,11 +24,10 @@ from skytemple_files.common.ppmdu_config.data import Pmd2Data
 from skytemple_files.common.ppmdu_config.script_data import Pmd2ScriptGameVar
 
 from skytemple_ssb_debugger.controller.debugger import DebuggerController
-from skytemple_ssb_debugger.controller.ground_state import resizable
 from skytemple_ssb_debugger.model.breakpoint_file_state import BreakpointFileState
 from skytemple_files.common.i18n_util import _
 
-from skytemple_ssb_debugger.ui_util import builder_get_assert, create_tree_view_column
+from skytemple_ssb_debugger.ui_util import builder_get_assert, create_tree_view_column, resizable
 
 
 class LocalVariableController:
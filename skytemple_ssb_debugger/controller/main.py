@@ -20,10 +20,11 @@ import logging
 import os
 import shutil
 import sys
+import threading
 import webbrowser
 from functools import partial
-from typing import Optional, Dict, List, cast, TypeVar
-from collections.abc import Sequence
+from typing import Optional, Dict, List, cast, TypeVar, Any
+from collections.abc import Callable, Sequence
 
 import cairo
 import gi
@@ -45,7 +46,7 @@ from gi.repository.GtkSource import StyleSchemeManager
 
 from explorerscript import EXPLORERSCRIPT_EXT
 from explorerscript.ssb_converting.ssb_data_types import SsbRoutineType
-from skytemple_files.common.script_util import SCRIPT_DIR
+from skytemple_files.common.script_util import SCRIPT_DIR, ScriptFiles
 from skytemple_ssb_debugger.context.abstract import AbstractDebuggerControlContext
 from skytemple_ssb_debugger.controller.debug_overlay import DebugOverlayController
 from skytemple_ssb_debugger.controller.debugger import DebuggerController
@@ -55,7 +56,9 @@ from skytemple_ssb_debugger.controller.local_variable import LocalVariableContro
 from skytemple_ssb_debugger.controller.global_state import GlobalStateController
 from skytemple_ssb_debugger.controller.variable import VariableController
 from skytemple_ssb_debugger.model.breakpoint_file_state import BreakpointFileState
+from skytemple_ssb_debugger.model.file_tree_search_index import FileTreeSearchIndex
 from skytemple_ssb_emulator import BreakpointState, BreakpointStateType
+from skytemple_ssb_debugger.model.rom_persistence import repack_state_path, store_repack_state, rom_needs_repack
 from skytemple_ssb_debugger.model.script_runtime_struct import ScriptRuntimeStruct
 from skytemple_ssb_debugger.model.settings import DebuggerSettingsStore, TEXTBOX_TOOL_URL
 from skytemple_ssb_debugger.model.ssb_files.file_manager import SsbFileManager
@@ -76,6 +79,8 @@ logger = logging.getLogger(__name__)
 SAVESTATE_EXT_DESUME = 'ds'
 SAVESTATE_EXT_GROUND_ENGINE = 'ge.json'
 COL_VISIBLE = 3
+COL_INDEX_ID = 4
+FILTER_DEBOUNCE_MS = 150
 SKYTEMPLE_WIKI_LINK = 'https://wiki.skytemple.org'
 
 
@@ -88,6 +93,7 @@ class MainController:
         self.settings = DebuggerSettingsStore()
         self.ssb_fm: SsbFileManager | None = None
         self.rom_was_loaded = False
+        self._rom_loading = False
         self._emu_is_running = False
 
         self.debugger: DebuggerController | None = None
@@ -101,11 +107,17 @@ class MainController:
         self._resize_timeout_id: int | None = None
 
         self._search_text: str | None = None
+        self._search_timeout_id: int | None = None
         self._ssb_item_filter: Gtk.TreeModelFilter | None = None
 
         self._log_stdout_io_source = None
 
-        self._file_tree_store = Gtk.TreeStore(str, str, str, bool)  # type: ignore
+        self._file_tree_store = Gtk.TreeStore(str, str, str, bool, int)  # type: ignore
+        # Search index over the file tree. Each row stores it's ID in the index in COL_INDEX_ID.
+        self._file_tree_index = FileTreeSearchIndex()
+        self._file_tree_iters: dict[int, Gtk.TreeIter] = {}
+        # IDs of all rows that are currently visible.
+        self._file_tree_visible: set[int] = set()
 
         self._current_screen_width = SCREEN_WIDTH
         self._current_screen_height = SCREEN_HEIGHT
@@ -120,6 +132,12 @@ class MainController:
         # Root branches for the maps. Contains entries in the form:
         # mapname
         self._registered_maps: dict[str, Gtk.TreeIter] = {}
+        # Rows of maps that were not expanded yet. The rows are already registered in the search index, but
+        # are only added to the tree store, once the map is expanded. Contains entries in the form:
+        # mapname -> [(entry id, parent entry id, row, key in self._tree_branches or None)]
+        self._lazy_maps: dict[str, list[tuple[int, int, list[str], str | None]]] = {}
+        # Search index entry IDs of the map root rows in self._lazy_maps.
+        self._lazy_map_names: dict[int, str] = {}
 
         spellcheck_enabled_item = builder_get_assert(self.builder, Gtk.CheckMenuItem, 'menu_spellcheck_enabled')
         spellcheck_enabled_item.set_active(self.settings.get_spellcheck_enabled())
@@ -481,7 +499,7 @@ class MainController:
 
     # MENU FILE
     def on_menu_open_activate(self, *args):
-        if not self.context.allows_interactive_file_management():
+        if not self.context.allows_interactive_file_management() or self._rom_loading:
             return
         emulator_pause()
 
@@ -786,7 +804,15 @@ class MainController:
     def on_ssb_file_search_search_changed(self, search: Gtk.SearchEntry):
         """Filter the main item view using the search field"""
         self._search_text = search.get_text().strip()
+        # We delay handling this, to only filter once the user is done typing.
+        if self._search_timeout_id is not None:
+            GLib.source_remove(self._search_timeout_id)
+        self._search_timeout_id = GLib.timeout_add(FILTER_DEBOUNCE_MS, self.on_ssb_file_search_search_changed__handle)
+
+    def on_ssb_file_search_search_changed__handle(self):
+        self._search_timeout_id = None
         self._filter__refresh_results()
+        return False
 
     def on_ssb_file_tree_button_press_event(self, tree: Gtk.TreeView, event: Gdk.EventButton):
         if event.type == Gdk.EventType.DOUBLE_BUTTON_PRESS:
@@ -860,7 +886,7 @@ class MainController:
         if response == Gtk.ResponseType.OK:
             abs_dirname = row[0] + os.path.sep + dirname
             os.makedirs(abs_dirname, exist_ok=True)
-            store.append(store.get_iter(treepath), [abs_dirname, dirname, 'exps_macro_dir', True])
+            self._file_tree_append(store.get_iter(treepath), [abs_dirname, dirname, 'exps_macro_dir'])
 
     def on_ssb_file_tree__menu_create_macro_file(self, store: Gtk.TreeStore, treepath: Gtk.TreePath, *args):
         row = store[treepath]
@@ -872,7 +898,7 @@ class MainController:
             os.makedirs(row[0], exist_ok=True)
             with open_utf8(abs_filename, 'w') as f:
                 f.write('')
-            store.append(store.get_iter(treepath), [abs_filename, filename, 'exps_macro', True])
+            self._file_tree_append(store.get_iter(treepath), [abs_filename, filename, 'exps_macro'])
 
     def on_ssb_file_tree__menu_delete_dir(self, model: Gtk.TreeModel, treepath: Gtk.TreePath, *args):
         row = model[treepath]
@@ -880,7 +906,7 @@ class MainController:
                                                       "{row[1]} with all of it's contents?")))
         if response == Gtk.ResponseType.DELETE_EVENT:
             shutil.rmtree(row[0])
-            del model[treepath]
+            self._file_tree_remove(model, treepath)
 
     def on_ssb_file_tree__menu_delete_file(self, model, treepath, *args):
         row = model[treepath]
@@ -888,11 +914,18 @@ class MainController:
                                                       "{row[1]}?")))
         if response == Gtk.ResponseType.DELETE_EVENT:
             os.remove(row[0])
-            del model[treepath]
+            self._file_tree_remove(model, treepath)
 
-    def init_file_tree(self):
+    def init_file_tree(self, script_files: ScriptFiles | None = None):
         ssb_file_tree_store: Gtk.TreeStore = self._file_tree_store
         ssb_file_tree_store.clear()
+        self._file_tree_index.clear()
+        self._file_tree_iters = {}
+        self._file_tree_visible = set()
+        self._tree_branches = {}
+        self._registered_maps = {}
+        self._lazy_maps = {}
+        self._lazy_map_names = {}
 
         if not self._ssb_item_filter:
             self._ssb_item_filter = ssb_file_tree_store.filter_new()
@@ -902,73 +935,117 @@ class MainController:
 
         self._set_sensitve('ssb_file_search', True)
 
-        script_files = self.context.load_script_files()
+        if script_files is None:
+            script_files = self.context.load_script_files()
 
         # EXPLORERSCRIPT MACROS
         #    -> Macros
         macros_dir_name = self.context.get_project_macro_dir()
-        macros_tree_nodes = {macros_dir_name: ssb_file_tree_store.append(
-            None, [macros_dir_name, _('Macros'), 'exps_macro_dir', True]
+        macros_tree_nodes = {macros_dir_name: self._file_tree_append(
+            None, [macros_dir_name, _('Macros'), 'exps_macro_dir']
         )}
         for root, dnames, fnames in os.walk(macros_dir_name):
             root_node = macros_tree_nodes[root]
             for dirname in dnames:
-                macros_tree_nodes[root + os.path.sep + dirname] = ssb_file_tree_store.append(
-                    root_node, [root + os.path.sep + dirname, dirname, 'exps_macro_dir', True]
+                macros_tree_nodes[root + os.path.sep + dirname] = self._file_tree_append(
+                    root_node, [root + os.path.sep + dirname, dirname, 'exps_macro_dir']
                 )
             for filename in fnames:
                 if len(filename) > 4 and filename[-5:] == EXPLORERSCRIPT_EXT:
-                    ssb_file_tree_store.append(root_node, [root + os.path.sep + filename, filename, 'exps_macro', True])
+                    self._file_tree_append(root_node, [root + os.path.sep + filename, filename, 'exps_macro'])
 
         # SSB SCRIPT FILES
         #    -> Common [common]
-        common_root = ssb_file_tree_store.append(None, ['', _('Common'), 'common_dir', True])
+        common_root = self._file_tree_append(None, ['', _('Common'), 'common_dir'])
         #       -> Master Script (unionall) [ssb]
         #       -> (others) [ssb]
         for name in script_files['common']:
-            ssb_file_tree_store.append(common_root, ['COMMON/' + name, name, 'ssb', True])
+            self._file_tree_append(common_root, ['COMMON/' + name, name, 'ssb'])
 
-        for i, map_obj in enumerate(script_files['maps'].values()):
+        for map_obj in script_files['maps'].values():
             #    -> (Map Name) [map]
-            map_root = ssb_file_tree_store.append(None, [map_obj['name'], map_obj['name'], 'map_root', True])
+            # The sub-branches are only added to the store once the map is expanded,
+            # until then it only contains a placeholder row.
+            map_root = self._file_tree_append(None, [map_obj['name'], map_obj['name'], 'map_root'])
             self._registered_maps[map_obj['name']] = map_root
+            map_id = self._file_tree_store[map_root][COL_INDEX_ID]
+            self._lazy_maps[map_obj['name']] = self._file_tree_register_map(map_obj, map_id)
+            self._lazy_map_names[map_id] = map_obj['name']
+            self._file_tree_store.append(map_root, ['', '', 'placeholder', True, -1])
 
-            enter_root = ssb_file_tree_store.append(map_root, [map_obj['name'], _('Enter (sse)'), 'map_sse', True])
-            self._tree_branches[f"{map_obj['name']}_enter"] = enter_root
-            if map_obj['enter_sse'] is not None:
-                #          -> Script X [ssb]
-                for ssb in map_obj['enter_ssbs']:
-                    ssb_name = f"{map_obj['name']}/{ssb}"
-                    self._scene_types[ssb_name] = 'sse'
-                    self._scene_names[ssb_name] = f"{map_obj['name']}/enter.sse"
-                    ssb_file_tree_store.append(enter_root, [ssb_name, ssb, 'ssb', True])
-
-            #       -> Acting Scripts [lsd]
-            acting_root = ssb_file_tree_store.append(map_root, [map_obj['name'], _('Acting (ssa)'), 'map_ssa', True])
-            self._tree_branches[f"{map_obj['name']}_acting"] = acting_root
-            for __, ssb in map_obj['ssas']:
-                #             -> Script [ssb]
+    def _file_tree_register_map(self, map_obj, map_id: int) -> list[tuple[int, int, list[str], str | None]]:
+        """
+        Register the sub-branches of a map in the search index and the scene mappings, without adding them
+        to the tree store yet. Returns the rows to add, when the map is expanded.
+        """
+        rows: list[tuple[int, int, list[str], str | None]] = []
+
+        def register(parent_id: int, row: list[str], branch_key: str | None = None) -> int:
+            entry_id = self._file_tree_index.add(row[1], parent_id)
+            self._file_tree_visible.add(entry_id)
+            rows.append((entry_id, parent_id, row, branch_key))
+            return entry_id
+
+        #       -> Enter Scripts [sse]
+        enter_root = register(map_id, [map_obj['name'], _('Enter (sse)'), 'map_sse'], f"{map_obj['name']}_enter")
+        if map_obj['enter_sse'] is not None:
+            #          -> Script X [ssb]
+            for ssb in map_obj['enter_ssbs']:
                 ssb_name = f"{map_obj['name']}/{ssb}"
-                self._scene_types[ssb_name] = 'ssa'
-                self._scene_names[ssb_name] = ssb_name
-                ssb_file_tree_store.append(acting_root, [ssb_name, ssb, 'ssb', True])
-
-            #       -> Sub Scripts [sub]
-            sub_root = ssb_file_tree_store.append(map_root, [map_obj['name'], _('Sub (sss)'), 'map_sss', True])
-            self._tree_branches[f"{map_obj['name']}_subroot"] = sub_root
-            for sss, ssbs in map_obj['subscripts'].items():
-                #          -> (name) [sub_entry]
-                sss_name = f"{map_obj['name']}/{sss}"
-                self._scene_types[sss_name] = 'sss'
-                self._scene_names[sss_name] = sss_name
-                sub_entry = ssb_file_tree_store.append(sub_root, [sss_name, sss, 'map_sss_entry', True])
-                self._tree_branches[sss_name.replace('/', '_')] = sub_entry
-                for ssb in ssbs:
-                    #             -> Script X [ssb]
-                    ssb_name = f"{map_obj['name']}/{ssb}"
-                    self._scene_types[ssb_name] = 'sss'
-                    self._scene_names[ssb_name] = sss_name
-                    ssb_file_tree_store.append(sub_entry, [ssb_name, ssb, 'ssb', True])
+                self._scene_types[ssb_name] = 'sse'
+                self._scene_names[ssb_name] = f"{map_obj['name']}/enter.sse"
+                register(enter_root, [ssb_name, ssb, 'ssb'])
+
+        #       -> Acting Scripts [lsd]
+        acting_root = register(map_id, [map_obj['name'], _('Acting (ssa)'), 'map_ssa'], f"{map_obj['name']}_acting")
+        for __, ssb in map_obj['ssas']:
+            #             -> Script [ssb]
+            ssb_name = f"{map_obj['name']}/{ssb}"
+            self._scene_types[ssb_name] = 'ssa'
+            self._scene_names[ssb_name] = ssb_name
+            register(acting_root, [ssb_name, ssb, 'ssb'])
+
+        #       -> Sub Scripts [sub]
+        sub_root = register(map_id, [map_obj['name'], _('Sub (sss)'), 'map_sss'], f"{map_obj['name']}_subroot")
+        for sss, ssbs in map_obj['subscripts'].items():
+            #          -> (name) [sub_entry]
+            sss_name = f"{map_obj['name']}/{sss}"
+            self._scene_types[sss_name] = 'sss'
+            self._scene_names[sss_name] = sss_name
+            sub_entry = register(sub_root, [sss_name, sss, 'map_sss_entry'], sss_name.replace('/', '_'))
+            for ssb in ssbs:
+                #             -> Script X [ssb]
+                ssb_name = f"{map_obj['name']}/{ssb}"
+                self._scene_types[ssb_name] = 'sss'
+                self._scene_names[ssb_name] = sss_name
+                register(sub_entry, [ssb_name, ssb, 'ssb'])
+
+        return rows
+
+    def _file_tree_populate_map(self, mapname: str):
+        """Add the rows of a map, that were only registered in the search index so far, to the tree store."""
+        rows = self._lazy_maps.pop(mapname, None)
+        if rows is None:
+            return
+        map_root = self._registered_maps[mapname]
+        del self._lazy_map_names[self._file_tree_store[map_root][COL_INDEX_ID]]
+        placeholder = self._file_tree_store.iter_children(map_root)
+        for entry_id, parent_id, row, branch_key in rows:
+            treeiter = self._file_tree_store.append(
+                self._file_tree_iters[parent_id], row + [entry_id in self._file_tree_visible, entry_id]
+            )
+            self._file_tree_iters[entry_id] = treeiter
+            if branch_key is not None:
+                self._tree_branches[branch_key] = treeiter
+        if placeholder is not None:
+            self._file_tree_store.remove(placeholder)
+
+    def on_ssb_file_tree_test_expand_row(self, tree: Gtk.TreeView, treeiter: Gtk.TreeIter, path: Gtk.TreePath):
+        assert self._ssb_item_filter is not None
+        child_iter = self._ssb_item_filter.convert_iter_to_child_iter(treeiter)
+        if self._file_tree_store[child_iter][2] == 'map_root':
+            self._file_tree_populate_map(self._file_tree_store[child_iter][0])
+        return False
 
     # CODE EDITOR NOTEBOOK
     def on_code_editor_notebook_switch_page(self, wdg, page, *args):
@@ -1104,6 +1181,12 @@ class MainController:
         self.rom_was_loaded = False
 
     def load_rom(self):
+        """
+        Loads the ROM that is open in the context.
+        If the context supports it, the ROM repacking and the loading of the script files run in parallel in worker
+        threads, otherwise one after the other in the GTK thread. Meanwhile the progress is shown in the info bar.
+        The remaining steps run in the GTK thread once both are done (see _load_rom__finish).
+        """
         try:
             # Unload old ROM first
             if self.rom_was_loaded:
@@ -1113,8 +1196,71 @@ class MainController:
             emulator_debug_init_breakpoint_manager(
                 os.path.join(self.context.get_project_debugger_dir(), f'{os.path.basename(fn)}.breakpoints.json')
             )
-            # Immediately save, because the module packs the ROM differently.
-            self.context.save_rom()
+        except BaseException as ex:
+            self._load_rom__error(sys.exc_info(), ex)
+            return
+
+        self._rom_loading = True
+        stages: dict[str, Callable[[], Any]] = {'script_files': self.context.load_script_files}
+        # Immediately save, because the module packs the ROM differently.
+        # This is skipped if the ROM file didn't change since it was last repacked.
+        if self._rom_needs_repack(fn):
+            stages['repack'] = partial(self._load_rom__repack, fn)
+        results: dict[str, Any] = {}
+        # The last step is the loading in the GTK thread.
+        nb_steps = len(stages) + 1
+
+        def on_stage_done(stage: str, result: Any, exc_info):
+            if not self._rom_loading:
+                # Another stage already failed.
+                return False
+            if exc_info is not None:
+                self._rom_loading = False
+                self._load_rom__error(exc_info, exc_info[1])
+                return False
+            results[stage] = result
+            self._load_rom__progress(len(results) / nb_steps)
+            if len(results) == len(stages):
+                self._load_rom__finish(results['script_files'])
+            return False
+
+        def run_stage(stage: str, func: Callable[[], Any]):
+            try:
+                result = func()
+            except BaseException:
+                GLib.idle_add(partial(on_stage_done, stage, None, sys.exc_info()))
+            else:
+                GLib.idle_add(partial(on_stage_done, stage, result, None))
+
+        self._load_rom__progress(0)
+        parallel = self.context.supports_parallel_rom_loading()
+        for stage, func in stages.items():
+            if parallel:
+                threading.Thread(target=run_stage, args=(stage, func)).start()
+            else:
+                GLib.idle_add(run_stage, stage, func)
+
+    def _load_rom__repack(self, fn: str):
+        self.context.save_rom()
+        # Contexts may already do this when saving, but not all of them do.
+        store_repack_state(fn, self._rom_repack_state_path(fn))
+
+    def _rom_repack_state_path(self, fn: str):
+        return repack_state_path(self.context.get_project_debugger_dir(), fn)
+
+    def _rom_needs_repack(self, fn: str) -> bool:
+        """Whether the ROM file changed since it was last written by the debugger."""
+        return rom_needs_repack(fn, self._rom_repack_state_path(fn))
+
+    def _load_rom__progress(self, fraction: float):
+        self.write_info_bar(Gtk.MessageType.INFO, _("Loading ROM..."))
+        progress = builder_get_assert(self.builder, Gtk.ProgressBar, 'info_bar_progress')
+        progress.set_fraction(fraction)
+        progress.show()
+
+    def _load_rom__finish(self, script_files: ScriptFiles):
+        assert self.ssb_fm is not None
+        try:
             rom_data = self.context.get_static_data()
             if self.debugger:
                 fl1 = []
@@ -1128,7 +1274,7 @@ class MainController:
                     debug_mode=builder_get_assert(self.builder, Gtk.CheckButton, 'debug_settings_debug_mode').get_active(),
                     debug_flag_1=fl1, debug_flag_2=fl2
                 )
-            self.init_file_tree()
+            self.init_file_tree(script_files)
             self.global_state_controller.init(rom_data)
             self.variable_controller.init(rom_data)
             self.local_variable_controller.init(rom_data)
@@ -1136,15 +1282,23 @@ class MainController:
             self.rom_was_loaded = True
             self.emu_reset()
         except BaseException as ex:
-            self.context.display_error(
-                sys.exc_info(),
-                f"Unable to load: {self.context.get_rom_filename()}\n{ex}"
-            )
-            self.ssb_fm = None
+            self._load_rom__error(sys.exc_info(), ex)
         else:
+            builder_get_assert(self.builder, Gtk.ProgressBar, 'info_bar_progress').hide()
             self.enable_editing_features()
             self.enable_debugging_features()
             self.emu_stop()
+        finally:
+            self._rom_loading = False
+
+    def _load_rom__error(self, exc_info, ex: BaseException):
+        builder_get_assert(self.builder, Gtk.ProgressBar, 'info_bar_progress').hide()
+        self.clear_info_bar()
+        self.context.display_error(
+            exc_info,
+            f"Unable to load: {self.context.get_rom_filename()}\n{ex}"
+        )
+        self.ssb_fm = None
 
     def enable_editing_features(self):
         code_editor_main = builder_get_assert(self.builder, Gtk.Box, 'code_editor_main')
@@ -1412,42 +1566,44 @@ class MainController:
             branch_name = f'{mapname}_{scene_name}'
         else:
             return  # todo: raise error?
-        ssb_file_tree_store: Gtk.TreeStore = self._file_tree_store
+        self._file_tree_populate_map(mapname)
         if branch_name not in self._tree_branches:
             self._create_tree_branch(*branch_name.split('_')[0:2])
         self._scene_types[ssb_path] = scene_type
         self._scene_names[ssb_path] = f'{mapname}/{scene_name}'
-        ssb_file_tree_store.append(self._tree_branches[branch_name], [
-            ssb_path, ssb_path.split('/')[-1], 'ssb', True
+        self._file_tree_append(self._tree_branches[branch_name], [
+            ssb_path, ssb_path.split('/')[-1], 'ssb'
         ])
+        self.context.on_script_added(ssb_path, mapname, scene_type, scene_name)
 
     def _create_tree_branch(self, mapname, branch):
         # TODO: Refactor class to only use this method for tree branch creation.
         if mapname not in self._registered_maps:
-            map_root = self._file_tree_store.append(None, [mapname, mapname, 'map_root', True])
+            map_root = self._file_tree_append(None, [mapname, mapname, 'map_root'])
             self._registered_maps[mapname] = map_root
         map_root = self._registered_maps[mapname]
 
         if branch == 'enter':
-            enter_root = self._file_tree_store.append(map_root, [mapname, _('Enter (sse)'), 'map_sse', True])
+            enter_root = self._file_tree_append(map_root, [mapname, _('Enter (sse)'), 'map_sse'])
             self._tree_branches[f"{mapname}_enter"] = enter_root
         elif branch == 'acting':
-            acting_root = self._file_tree_store.append(map_root, [mapname, _('Acting (ssa)'), 'map_ssa', True])
+            acting_root = self._file_tree_append(map_root, [mapname, _('Acting (ssa)'), 'map_ssa'])
             self._tree_branches[f"{mapname}_acting"] = acting_root
         else:
             if f'{mapname}_subroot' not in self._tree_branches:
-                sub_root = self._file_tree_store.append(map_root, [mapname, _('Sub (sss)'), 'map_sss', True])
+                sub_root = self._file_tree_append(map_root, [mapname, _('Sub (sss)'), 'map_sss'])
                 self._tree_branches[f"{mapname}_subroot"] = sub_root
             sub_root = self._tree_branches[f"{mapname}_subroot"]
             sss_name = f"{mapname}/{branch.replace('_','/')}"
             self._scene_types[sss_name] = 'sss'
             self._scene_names[sss_name] = sss_name
-            sub_entry = self._file_tree_store.append(sub_root, [sss_name, branch.replace('_', '/'), 'map_sss_entry', True])
+            sub_entry = self._file_tree_append(sub_root, [sss_name, branch.replace('_', '/'), 'map_sss_entry'])
             self._tree_branches[sss_name.replace('/', '_')] = sub_entry
 
     def on_script_removed(self, ssb_path):
         """Handle a SSB file removal."""
-        # todo
+        # todo: remove from file tree
+        self.context.on_script_removed(ssb_path.replace(SCRIPT_DIR + '/', ''))
 
     # Debug Flags Checkbox
     def on_chk_debug_flag_1_toggled(self, w):
@@ -1563,61 +1719,68 @@ class MainController:
         if self.renderer:
             self.renderer.set_boost(state)
 
-    # TODO: CODE DUPLICATION BETWEEN SKYTEMPLE AND SSB DEBUGGER -- If we ever make a common package, this must go into it!
+    def _file_tree_append(self, parent: Gtk.TreeIter | None, row: list) -> Gtk.TreeIter:
+        """Append a row to the file tree and register it in the search index. row is [path, name, type]."""
+        parent_id = self._file_tree_store[parent][COL_INDEX_ID] if parent is not None else None
+        entry_id = self._file_tree_index.add(row[1], parent_id)
+        treeiter = self._file_tree_store.append(parent, row + [True, entry_id])
+        self._file_tree_iters[entry_id] = treeiter
+        self._file_tree_visible.add(entry_id)
+        return treeiter
+
+    def _file_tree_remove(self, store: Gtk.TreeStore, treepath: Gtk.TreePath):
+        """Remove a row and all of it's children from the file tree and the search index."""
+        for entry_id in self._file_tree_index.remove(store[treepath][COL_INDEX_ID]):
+            del self._file_tree_iters[entry_id]
+            self._file_tree_visible.discard(entry_id)
+        del store[treepath]
+
     def _filter__refresh_results(self):
-        """Filter the main item view"""
+        """Filter the main item view. Only rows that change their visibility are updated."""
         item_store = self._file_tree_store
-        if self._search_text == "":
-            item_store.foreach(self._filter__reset_row, True)
+        matches: set[int] = set()
+        if not self._search_text:
+            new_visible = self._file_tree_index.all()
         else:
-            builder_get_assert(self.builder, Gtk.TreeView, 'ssb_file_tree').collapse_all()
-            item_store.foreach(self._filter__reset_row, False)
-            item_store.foreach(self._filter__show_matches)
-            assert self._ssb_item_filter is not None
-            self._ssb_item_filter.foreach(self._filter__expand_all_visible)
-
-    def _filter__reset_row(self, model, path, iter, make_visible):
-        """Change the visibility of the given row"""
-        model[iter][COL_VISIBLE] = make_visible
-
-    def _filter__make_path_visible(self, model, iter):
-        """Make a row and its ancestors visible"""
-        while iter:
-            model[iter][COL_VISIBLE] = True
-            iter = model.iter_parent(iter)
-
-    def _filter__make_subtree_visible(self, model, iter):
-        """Make descendants of a row visible"""
-        for i in range(model.iter_n_children(iter)):
-            subtree = model.iter_nth_child(iter, i)
-            if model[subtree][COL_VISIBLE]:
-                # Subtree already visible
-                continue
-            model[subtree][COL_VISIBLE] = True
-            self._filter__make_subtree_visible(model, subtree)
-
-    def _filter__expand_all_visible(self, model: Gtk.TreeStore, path, iter):
-        """
-        This is super annoying. Because of the two different "views" on the model,
-        we can't do this in show_matches, because we have to use the filter model here!
-        """
+            matches, new_visible = self._file_tree_index.search(self._search_text)
+        for entry_id in new_visible ^ self._file_tree_visible:
+            # Rows of maps that were not expanded yet get their visibility when they are added.
+            if entry_id in self._file_tree_iters:
+                item_store[self._file_tree_iters[entry_id]][COL_VISIBLE] = entry_id in new_visible
+        self._file_tree_visible = new_visible
+
         if self._search_text:
-            search_query = self._search_text.lower()
-            text = model[iter][1].lower()
             ssb_file_tree = builder_get_assert(self.builder, Gtk.TreeView, 'ssb_file_tree')
-            if search_query in text:
-                ssb_file_tree.expand_to_path(path)
+            ssb_file_tree.collapse_all()
+            self._filter__expand_matches(ssb_file_tree, matches)
 
-    def _filter__show_matches(self, model: Gtk.TreeStore, path, iter):
-        if self._search_text:
-            search_query = self._search_text.lower()
-            text = model[iter][1].lower()
-            if search_query in text:
-                # Propagate visibility change up
-                self._filter__make_path_visible(model, iter)
-                # Propagate visibility change down
-                self._filter__make_subtree_visible(model, iter)
-    # END CODE DUPLICATION
+    def _filter__expand_matches(self, ssb_file_tree: Gtk.TreeView, matches: set[int]):
+        """
+        Expand the tree view to show all matches. Leaf matches only need their parent expanded and rows
+        that are ancestors of other rows to expand are expanded implicitly, so expand_to_path is only
+        called once for each of the remaining rows.
+        """
+        assert self._ssb_item_filter is not None
+        to_expand: set[int] = set()
+        for entry_id in matches:
+            if self._file_tree_index.has_children(entry_id):
+                to_expand.add(entry_id)
+            else:
+                parent = self._file_tree_index.parent(entry_id)
+                if parent is not None:
+                    to_expand.add(parent)
+        implicitly_expanded: set[int] = set()
+        for entry_id in to_expand:
+            implicitly_expanded.update(self._file_tree_index.ancestors(entry_id))
+        for entry_id in to_expand - implicitly_expanded:
+            root = self._file_tree_index.root(entry_id)
+            if root in self._lazy_map_names:
+                self._file_tree_populate_map(self._lazy_map_names[root])
+            path = self._ssb_item_filter.convert_child_path_to_path(
+                self._file_tree_store.get_path(self._file_tree_iters[entry_id])
+            )
+            if path is not None:
+                ssb_file_tree.expand_to_path(path)
 
     def _set_sensitve(self, name, state):
         w = builder_get_assert(self.builder, Gtk.Widget, name)
@@ -25,9 +25,8 @@ from typing import Tuple, List, Optional, TYPE_CHECKING, Dict, cast
 from collections.abc import Callable
 from collections.abc import Iterable
 
-from gi.repository import GtkSource, Gtk
+from gi.repository import GtkSource, Gtk, Pango, GLib
 from gi.repository.GtkSource import LanguageManager
-from gtkspellcheck import SpellChecker
 
 from explorerscript.error import ParseError
 from explorerscript.ssb_converting.ssb_data_types import SsbRoutineType
@@ -38,15 +37,18 @@ from skytemple_files.common.ppmdu_config.data import Pmd2Data
 from skytemple_ssb_emulator import emulator_debug_breakpoints_resync, emulator_debug_breakpoint_add, \
     emulator_debug_breakpoint_remove, emulator_breakpoints_get_saved_in_ram_for
 
+from skytemple_ssb_debugger.model.background_compiler import BackgroundCompiler
 from skytemple_ssb_debugger.model.completion.calltips.calltip_emitter import CalltipEmitter
 from skytemple_ssb_debugger.model.completion.calltips.string_event_emitter import StringEventEmitter
 from skytemple_ssb_debugger.model.completion.constants import GtkSourceCompletionSsbConstants
 from skytemple_ssb_debugger.model.completion.exps_statements import GtkSourceCompletionExplorerScriptStatements
 from skytemple_ssb_debugger.model.completion.functions import GtkSourceCompletionSsbFunctions
-from skytemple_ssb_debugger.model.completion.util import filter_special_exps_opcodes
+from skytemple_ssb_debugger.model.completion.opcode_index import OpcodeIndex
 from skytemple_ssb_debugger.model.constants import ICON_ACTOR, ICON_OBJECT, ICON_PERFORMER, ICON_GLOBAL_SCRIPT
-from skytemple_ssb_debugger.model.editor_text_mark_util import EditorTextMarkUtil, CATEGORY_OPCODE, CATEGORY_BREAKPOINT
-from skytemple_ssb_debugger.model.script_file_context.abstract import AbstractScriptFileContext
+from skytemple_ssb_debugger.model.editor_text_mark_util import EditorTextMarkUtil, CATEGORY_BREAKPOINT
+from skytemple_ssb_debugger.model.opcode_line_index import OpcodeLineIndex
+from skytemple_ssb_debugger.model.viewport_spell_checker import ViewportSpellChecker
+from skytemple_ssb_debugger.model.script_file_context.abstract import AbstractScriptFileContext, OpcodeTextMark
 from skytemple_ssb_debugger.model.settings import TEXTBOX_TOOL_URL
 from skytemple_ssb_debugger.pixbuf.icons import *
 from skytemple_files.common.i18n_util import f, _
@@ -60,6 +62,10 @@ logger = logging.getLogger(__name__)
 
 
 EXECUTION_LINE_PATTERN = re.compile('execution_(\\d+)_(\\d+)_(\\d+)')
+CATEGORY_DIAGNOSTIC = 'diagnostic'
+TAG_DIAGNOSTIC = 'diagnostic'
+# Number of lines inserted into the buffer at once when loading the source code.
+LOAD_CHUNK_LINES = 2000
 
 
 class ScriptEditorController:
@@ -90,18 +96,31 @@ class ScriptEditorController:
         self._lm.set_search_path(self._lm.get_search_path() + [os.path.join(path, '..')])
 
         self._waiting_for_reload = False
+        self._saving = False
+        # Last state reported by on_ssbs_state_change (breakable, ram_state_up_to_date)
+        self._ssbs_state = (True, True)
 
         self._explorerscript_view: GtkSource.View = None  # type: ignore
-        self._explorerscript_spellcheck: SpellChecker = None  # type: ignore
+        self._explorerscript_spellcheck: ViewportSpellChecker = None  # type: ignore
         self._explorerscript_revealer: Gtk.Revealer = None  # type: ignore
         self._explorerscript_search: Gtk.SearchEntry = None  # type: ignore
         self._explorerscript_search_context: GtkSource.SearchContext = None  # type: ignore
+        # Positions of the opcodes in the ExplorerScript view
+        self._opcode_index = OpcodeLineIndex()
         self._saving_dialog: Gtk.Dialog | None = None
 
         self._still_loading = True
+        # The source code is still being inserted into the buffer, see load_views.
+        self._loading_text = False
+        # Idle source inserting the next chunk of the source code
+        self._load_chunks_source_id: int | None = None
+        # Called once the source code is completely in the buffer.
+        self._after_text_loaded: list[Callable[[], None]] = []
         self._foucs_opcode_after_load: tuple[str, int] | None = None
         self._on_break_pulled_after_load: tuple[str, int, bool] | None = None
         self._hanger_halt_lines_after_load: tuple[str, list[tuple[SsbRoutineType, int, int]]] | None = None
+        # Names of the execution line marks -> (ssb_filename, opcode_addr) they were placed for
+        self._execution_lines: dict[str, tuple[str, int]] = {}
         self._spellchecker_loaded = False
 
         self._loaded_search_window: Gtk.Dialog | None = None
@@ -114,12 +133,22 @@ class ScriptEditorController:
 
         self._mrk_attrs__execution_line: GtkSource.MarkAttributes = GtkSource.MarkAttributes.new()
 
+        self._mrk_attrs__diagnostic: GtkSource.MarkAttributes = GtkSource.MarkAttributes.new()
+        self._mrk_attrs__diagnostic.set_icon_name('dialog-error')
+        self._mrk_attrs__diagnostic.connect('query-tooltip-text', self.on_diagnostic_query_tooltip_text)
+        # Message of the diagnostic mark, if any
+        self._diagnostic_message: str | None = None
+        self._background_compiler = BackgroundCompiler(
+            self._get_explorerscript_source, self.file_context.check, self.on_background_compile_done
+        )
+
         self.switch_style_scheme(self._active_scheme)
 
         self.file_context.register_ssbs_state_change_handler(self.on_ssbs_state_change)
         self.file_context.register_ssbs_reload_handler(self.reload_breakpoints)
-        self.file_context.register_insert_opcode_text_mark_handler(self.insert_opcode_text_mark)
+        self.file_context.register_insert_opcode_text_marks_handler(self.insert_opcode_text_marks)
         self.file_context.register_clear_opcode_text_mark_handler(self.clear_opcode_text_marks)
+        self.file_context.register_save_progress_handler(self.on_save_progress)
 
         self.load_views(
             builder_get_assert(self.builder, Gtk.Box, 'page_explorerscript')
@@ -135,6 +164,9 @@ class ScriptEditorController:
         return self._root
 
     def destroy(self):
+        self._stop_loading_text()
+        self._after_text_loaded = []
+        self._background_compiler.destroy()
         self.file_context.destroy()
         self._root.destroy()
 
@@ -166,7 +198,7 @@ class ScriptEditorController:
             expsb: GtkSource.Buffer = self._explorerscript_view.get_buffer()
             if ssb_filename is not None and opcode_addr != -1:
                 EditorTextMarkUtil.add_line_mark_for_op(
-                    expsb, ssb_filename, opcode_addr, 'breaked-line', 'breaked-line',
+                    expsb, self._opcode_index, ssb_filename, opcode_addr, 'breaked-line', 'breaked-line',
                     halted_on_call
                 )
 
@@ -197,13 +229,21 @@ class ScriptEditorController:
             self._hanger_halt_lines_after_load = (ssb_filename, lines)
         else:
             expsb: GtkSource.Buffer = self._explorerscript_view.get_buffer()
-            EditorTextMarkUtil.remove_all_line_marks(expsb, 'execution-line')
-            for type, slot_id, opcode_addr in lines:
-                EditorTextMarkUtil.add_line_mark_for_op(
-                    expsb, ssb_filename, opcode_addr,
-                    f'execution_{type.value}_{type.value}_{slot_id}', 'execution-line',
+            new_execution_lines = {
+                f'execution_{type.value}_{type.value}_{slot_id}': (ssb_filename, opcode_addr)
+                for type, slot_id, opcode_addr in lines
+            }
+            # Only the marks of routines that moved or stopped are changed.
+            for name in self._execution_lines.keys() - new_execution_lines.keys():
+                EditorTextMarkUtil.remove_line_mark(expsb, name)
+            for name, (op_ssb_filename, opcode_addr) in new_execution_lines.items():
+                if self._execution_lines.get(name) == (op_ssb_filename, opcode_addr) and expsb.get_mark(name) is not None:
+                    continue
+                EditorTextMarkUtil.set_line_mark_for_op(
+                    expsb, self._opcode_index, op_ssb_filename, opcode_addr, name, 'execution-line',
                     False  # TODO: Call breaking
                 )
+            self._execution_lines = new_execution_lines
 
     def remove_hanger_halt_lines(self):
         """Remove the marks for the current script execution points"""
@@ -212,6 +252,7 @@ class ScriptEditorController:
         else:
             expsb: GtkSource.Buffer = self._explorerscript_view.get_buffer()
             EditorTextMarkUtil.remove_all_line_marks(expsb, 'execution-line')
+            self._execution_lines = {}
 
     def focus_opcode(self, ssb_filename, opcode_addr):
         """Put a textmark representing an opcode into the center of view."""
@@ -220,7 +261,7 @@ class ScriptEditorController:
         else:
             expsv = self._explorerscript_view
             EditorTextMarkUtil.scroll_to_op(
-                expsv.get_buffer(), expsv, ssb_filename, opcode_addr,
+                expsv.get_buffer(), self._opcode_index, expsv, ssb_filename, opcode_addr,
                 False  # TODO: Call breaking
             )
 
@@ -235,10 +276,14 @@ class ScriptEditorController:
         if self._explorerscript_view.get_buffer().get_modified():
             modified_buffer = self._explorerscript_view.get_buffer()
             save_text = modified_buffer.props.text
-        if not save_text:
+        if not save_text or self._saving:
             return
 
-        if modified_buffer.get_line_count() > 4000 or isinstance(self.file_context, ExpsMacroFileScriptFileContext):
+        # The buffer must not change while saving, since it is marked as unmodified afterwards.
+        # Saving a macro recompiles other scripts, so all other editors are locked as well.
+        self._saving = True
+        self._explorerscript_view.set_editable(False)
+        if isinstance(self.file_context, ExpsMacroFileScriptFileContext):
             self._main_window.set_sensitive(False)
 
         self.file_context.save(save_text=save_text,
@@ -248,9 +293,8 @@ class ScriptEditorController:
 
     def _save_done_error(self, exc_info, err):
         """Gtk callback after the saving has been done, but an error occured."""
-        if not self._main_window.is_sensitive():
-            self._main_window.set_sensitive(True)
-            self._explorerscript_view.grab_focus()
+        self.on_ssbs_state_change(*self._ssbs_state)
+        self._end_saving()
         prefix = ''
         if isinstance(err, ParseError):
             prefix = _('Parse error: ')
@@ -265,24 +309,42 @@ class ScriptEditorController:
         """Gtk callback after the saving has been done."""
         modified_buffer.set_modified(False)
         self._waiting_for_reload = True
+        # The saved source compiled, so there is nothing to report.
+        self._background_compiler.cancel()
+        self._clear_diagnostics()
+        # Replace the save progress in the info bar with the actual state again.
+        self.on_ssbs_state_change(*self._ssbs_state)
 
         # Resync the breakpoints at the Breakpoint Manager.
         breakpoints_to_resync: dict[str, list[int]] = {}
-        for line in range(0, modified_buffer.get_line_count()):
-            marks = EditorTextMarkUtil.get_line_marks_for(modified_buffer, line, 'breakpoint')
-            if len(marks) > 0:
-                for ssb_filename, opcode_offset in EditorTextMarkUtil.get_opcodes_in_line(modified_buffer, line):
-                    if ssb_filename not in breakpoints_to_resync:
-                        breakpoints_to_resync[ssb_filename] = []
-                    breakpoints_to_resync[ssb_filename].append(opcode_offset)
+        for line in EditorTextMarkUtil.get_lines_with_marks(modified_buffer, CATEGORY_BREAKPOINT):
+            for ssb_filename, opcode_offset in EditorTextMarkUtil.get_opcodes_in_line(self._opcode_index, line):
+                if ssb_filename not in breakpoints_to_resync:
+                    breakpoints_to_resync[ssb_filename] = []
+                breakpoints_to_resync[ssb_filename].append(opcode_offset)
 
         for ssb_filename, b_points in breakpoints_to_resync.items():
             assert self.parent.file_manager is not None
             emulator_debug_breakpoints_resync(ssb_filename, b_points, self.parent.file_manager.get(ssb_filename))
 
+        self._end_saving()
+
+    def _end_saving(self):
+        self._saving = False
+        self._explorerscript_view.set_editable(True)
         if not self._main_window.is_sensitive():
             self._main_window.set_sensitive(True)
-            self._explorerscript_view.grab_focus()
+        self._explorerscript_view.grab_focus()
+
+    def _stop_loading_text(self):
+        """Stops inserting the source code into the buffer, if that is still in progress."""
+        if self._load_chunks_source_id is not None:
+            GLib.source_remove(self._load_chunks_source_id)
+            self._load_chunks_source_id = None
+        if self._loading_text:
+            buffer: GtkSource.Buffer = self._explorerscript_view.get_buffer()
+            assert_not_none(buffer.get_undo_manager()).end_not_undoable_action()
+            self._loading_text = False
 
     def load_views(self, exps_bx: Gtk.Box):
         self._activate_spinner(exps_bx)
@@ -290,9 +352,6 @@ class ScriptEditorController:
         (exps_ovl, self._explorerscript_view, self._explorerscript_revealer,
          self._explorerscript_search, self._explorerscript_search_context) = self._create_editor()
 
-        # SPELL CHECK
-        self.toggle_spellchecker(self.parent.parent.settings.get_spellcheck_enabled())
-
         self._load_explorerscript_completion()
 
         def load__gtk__process_loaded(text, language):
@@ -303,15 +362,41 @@ class ScriptEditorController:
                 bx.remove(child)
             buffer: GtkSource.Buffer = view.get_buffer()
             undo_manager: GtkSource.UndoManager = assert_not_none(buffer.get_undo_manager())
+            # The text is inserted in chunks, so that the top of the file is shown right away and large files
+            # don't block the main loop. Highlighting is only enabled once all text is in the buffer.
+            chunks = iter(_split_into_line_chunks(text, LOAD_CHUNK_LINES))
+            # The text may be loaded again before the previous text was completely inserted.
+            self._stop_loading_text()
+            self._loading_text = True
+            view.set_editable(False)
             undo_manager.begin_not_undoable_action()
-            buffer.set_text(text)
-            buffer.set_modified(False)
-            undo_manager.end_not_undoable_action()
+            buffer.set_highlight_syntax(False)
             buffer.set_language(self._lm.get_language(language))
-            buffer.set_highlight_syntax(True)
+            buffer.set_text(next(chunks, ''))
+            buffer.place_cursor(buffer.get_start_iter())
 
             bx.pack_start(ovl, True, True, 0)
 
+            def load__gtk__insert_next_chunk():
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    buffer.insert(buffer.get_end_iter(), chunk)
+                    return True
+                self._load_chunks_source_id = None
+                buffer.set_modified(False)
+                undo_manager.end_not_undoable_action()
+                buffer.set_highlight_syntax(True)
+                view.set_editable(True)
+                self._loading_text = False
+                after_text_loaded = self._after_text_loaded
+                self._after_text_loaded = []
+                for callback in after_text_loaded:
+                    callback()
+                return False
+
+            if load__gtk__insert_next_chunk():
+                self._load_chunks_source_id = GLib.idle_add(load__gtk__insert_next_chunk)
+
         def load__gtk__exps_hash_error(force_decompile: Callable, force_load: Callable):
             if self._show_ssbs_es_changed_warning():
                 # Re-generate the ExplorerScript
@@ -330,6 +415,9 @@ class ScriptEditorController:
             )
 
         def load_gtk__after():
+            if self._loading_text:
+                self._after_text_loaded.append(load_gtk__after)
+                return
             self.file_context.request_ssbs_state()
             if self._still_loading:
                 self._after_views_loaded()
@@ -341,6 +429,8 @@ class ScriptEditorController:
 
     def _after_views_loaded(self):
         self._still_loading = False
+        # SPELL CHECK
+        self.toggle_spellchecker(self.parent.parent.settings.get_spellcheck_enabled())
         if self._foucs_opcode_after_load:
             self.focus_opcode(*self._foucs_opcode_after_load)
         if self._on_break_pulled_after_load:
@@ -349,8 +439,7 @@ class ScriptEditorController:
             self.insert_hanger_halt_lines(*self._hanger_halt_lines_after_load)
 
     def add_breakpoint(self, line_number: int, view: GtkSource.View):
-        buffer: GtkSource.Buffer = view.get_buffer()
-        for ssb_filename, opcode_offset in EditorTextMarkUtil.get_opcodes_in_line(buffer, line_number - 1):
+        for ssb_filename, opcode_offset in EditorTextMarkUtil.get_opcodes_in_line(self._opcode_index, line_number - 1):
             emulator_debug_breakpoint_add(ssb_filename, opcode_offset)
 
     def remove_breakpoint(self, mark: GtkSource.Mark):
@@ -359,7 +448,7 @@ class ScriptEditorController:
 
     def on_breakpoint_added(self, ssb_filename, opcode_offset):
         buffer: GtkSource.Buffer = self._explorerscript_view.get_buffer()
-        EditorTextMarkUtil.add_breakpoint_line_mark(buffer, ssb_filename, opcode_offset)
+        EditorTextMarkUtil.add_breakpoint_line_mark(buffer, self._opcode_index, ssb_filename, opcode_offset)
 
     def on_breakpoint_removed(self, ssb_filename, opcode_offset):
         buffer: GtkSource.Buffer = self._explorerscript_view.get_buffer()
@@ -378,20 +467,24 @@ class ScriptEditorController:
         for opcode_offset in emulator_breakpoints_get_saved_in_ram_for(ssb_filename):
             self.on_breakpoint_added(ssb_filename, opcode_offset)
 
-    def insert_opcode_text_mark(self, ssb_filename: str,
-                                opcode_offset: int, line: int, column: int, is_for_macro_call=False):
-        view = self._explorerscript_view
-        EditorTextMarkUtil.create_opcode_mark(
-            view.get_buffer(), ssb_filename, opcode_offset, line, column, is_for_macro_call
-        )
+    def insert_opcode_text_marks(self, marks: list[OpcodeTextMark]):
+        if self._loading_text:
+            # The positions are only valid once all text is in the buffer.
+            self._after_text_loaded.append(partial(self.insert_opcode_text_marks, marks))
+            return
+        EditorTextMarkUtil.create_opcode_marks(self._opcode_index, marks)
 
     def clear_opcode_text_marks(self):
-        view = self._explorerscript_view
-        EditorTextMarkUtil.remove_all_line_marks(view.get_buffer(), CATEGORY_OPCODE)
+        self._opcode_index.clear()
+        # The positions of the opcodes may change, so all execution lines need to be placed again.
+        if self._explorerscript_view is not None:
+            EditorTextMarkUtil.remove_all_line_marks(self._explorerscript_view.get_buffer(), 'execution-line')
+        self._execution_lines = {}
 
     # Signal & event handlers
     def on_ssbs_state_change(self, breakable: bool, _ram_state_up_to_date: bool):
         """Fully rebuild the active info bar message based on the current state of the SSB."""
+        self._ssbs_state = (breakable, _ram_state_up_to_date)
         info_bar = builder_get_assert(self.builder, Gtk.InfoBar, 'code_editor_box_es_bar')
 
         if not breakable:
@@ -404,6 +497,13 @@ class ScriptEditorController:
         info_bar.set_message_type(Gtk.MessageType.OTHER)
         info_bar.set_revealed(False)
 
+    def on_save_progress(self, nb_done: int, nb_total: int):
+        info_bar = builder_get_assert(self.builder, Gtk.InfoBar, 'code_editor_box_es_bar')
+        self._refill_info_bar(
+            info_bar, Gtk.MessageType.INFO,
+            f(_("Recompiling scripts using this file ({nb_done}/{nb_total})..."))
+        )
+
     def on_sourceview_line_mark_activated(self, widget: GtkSource.View, textiter: Gtk.TextIter, event: Gdk.Event):
         marks = widget.get_buffer().get_source_marks_at_iter(textiter)
 
@@ -428,9 +528,18 @@ class ScriptEditorController:
                 self.remove_breakpoint(m)
 
         buffer.remove_source_marks(start, end)
+        self._opcode_index.delete((start.get_line(), start.get_line_offset()), (end.get_line(), end.get_line_offset()))
 
         return True
 
+    def on_sourcebuffer_insert_text_after(self, buffer: GtkSource.Buffer, location: Gtk.TextIter, text: str, length: int):
+        # location was moved to the end of the inserted text.
+        start = location.copy()
+        start.backward_chars(len(text))
+        self._opcode_index.insert(
+            (start.get_line(), start.get_line_offset()), (location.get_line(), location.get_line_offset())
+        )
+
     def on_search_entry_focus_out_event(self, widget: Gtk.SearchEntry, *args):
         view = self._explorerscript_view
         revealer = self._explorerscript_revealer
@@ -549,6 +658,45 @@ class ScriptEditorController:
         if self._modified_handler:
             self._modified_handler(self, buffer.get_modified())
 
+    def on_text_buffer_changed(self, buffer: Gtk.TextBuffer, *args):
+        if self._still_loading:
+            return
+        self._background_compiler.schedule()
+
+    def _get_explorerscript_source(self) -> str:
+        return self._explorerscript_view.get_buffer().props.text
+
+    def on_background_compile_done(self, err: BaseException | None):
+        """Show the result of compiling the source while typing as diagnostic marks."""
+        buffer: GtkSource.Buffer = self._explorerscript_view.get_buffer()
+        self._clear_diagnostics()
+        if err is None:
+            return
+        line = 0
+        column = 0
+        if isinstance(err, ParseError):
+            line = max(0, min(err.error.line - 1, buffer.get_line_count() - 1))
+            column = max(0, err.error.column)
+        self._diagnostic_message = str(err)
+        start = buffer.get_iter_at_line(line)
+        if column < start.get_chars_in_line():
+            start.set_line_offset(column)
+        end = start.copy()
+        if not end.ends_line():
+            end.forward_to_line_end()
+        buffer.create_source_mark(None, CATEGORY_DIAGNOSTIC, start)
+        buffer.apply_tag_by_name(TAG_DIAGNOSTIC, start, end)
+
+    def on_diagnostic_query_tooltip_text(self, attrs: GtkSource.MarkAttributes, mark: GtkSource.Mark):
+        return self._diagnostic_message or ''
+
+    def _clear_diagnostics(self):
+        buffer: GtkSource.Buffer = self._explorerscript_view.get_buffer()
+        start, end = buffer.get_bounds()
+        buffer.remove_source_marks(start, end, CATEGORY_DIAGNOSTIC)
+        buffer.remove_tag_by_name(TAG_DIAGNOSTIC, start, end)
+        self._diagnostic_message = None
+
     # Breakpoint Buttons
     def on_code_editor_cntrls_resume_clicked(self, btn: Gtk.Button, *args):
         self.parent.pull_break__resume()
@@ -588,7 +736,7 @@ class ScriptEditorController:
                         self._explorerscript_spellcheck.disable()
             elif value:
                 self._spellchecker_loaded = True
-                self._explorerscript_spellcheck = SpellChecker(self._explorerscript_view, 'en_US')
+                self._explorerscript_spellcheck = ViewportSpellChecker(self._explorerscript_view, 'en_US')
                 # Do not correct any special words (Operations, keywords, Pokémon names, constants, etc.)
                 # TODO THIS IS SUPER SLOW UNDER WINDOWS.
                 #for word in self.parent.get_context().get_special_words():
@@ -686,6 +834,7 @@ class ScriptEditorController:
         view.set_mark_attributes('breakpoint', self._mrk_attrs__breakpoint, 1)
         view.set_mark_attributes('execution-line', self._mrk_attrs__execution_line, 10)
         view.set_mark_attributes('breaked-line', self._mrk_attrs__breaked_line, 100)
+        view.set_mark_attributes(CATEGORY_DIAGNOSTIC, self._mrk_attrs__diagnostic, 50)
 
         buffer: GtkSource.Buffer = view.get_buffer()
         gutter: GtkSource.Gutter = view.get_gutter(Gtk.TextWindowType.LEFT)
@@ -707,8 +856,11 @@ class ScriptEditorController:
 
         view.connect("line-mark-activated", self.on_sourceview_line_mark_activated)
         buffer.connect("delete-range", self.on_sourcebuffer_delete_range)
+        buffer.connect_after("insert-text", self.on_sourcebuffer_insert_text_after)
 
         buffer.connect("modified-changed", self.on_text_buffer_modified)
+        buffer.connect("changed", self.on_text_buffer_changed)
+        buffer.create_tag(TAG_DIAGNOSTIC, underline=Pango.Underline.ERROR)
 
         sw.add(view)
         ovl.add(sw)
@@ -761,14 +913,13 @@ class ScriptEditorController:
         view = self._explorerscript_view
         completion: GtkSource.Completion = view.get_completion()
 
+        opcode_index = OpcodeIndex.get_for(self.rom_data.script_data)
         completion.add_provider(GtkSourceCompletionSsbConstants(self.rom_data))
-        completion.add_provider(GtkSourceCompletionSsbFunctions(
-            filter_special_exps_opcodes(self.rom_data.script_data.op_codes)
-        ))
+        completion.add_provider(GtkSourceCompletionSsbFunctions(opcode_index))
         completion.add_provider(GtkSourceCompletionExplorerScriptStatements())
         CalltipEmitter(
             self._explorerscript_view,
-            self.rom_data.script_data.op_codes,
+            opcode_index,
             self.mapname,  # type: ignore
             *self.file_context.get_scene_name_and_type(),  # type: ignore
             self.parent.get_context()  # type: ignore
@@ -819,6 +970,22 @@ def color_hex_to_rgb(hexx, alpha):
     return tuple(int(hexx.lstrip('#')[i:i+2], 16) for i in (0, 2, 4)) + (alpha,)
 
 
+def _split_into_line_chunks(text: str, nb_lines: int) -> list[str]:
+    """Splits the text into chunks of nb_lines lines each."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start
+        for _ in range(nb_lines):
+            end = text.find('\n', end) + 1
+            if end == 0:
+                end = len(text)
+                break
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
 class PlayIconRenderer(GtkSource.GutterRendererPixbuf):
     """Renders a play"""
     def __init__(self, view, **properties):
@@ -832,6 +999,13 @@ class PlayIconRenderer(GtkSource.GutterRendererPixbuf):
         self._icon_object = icon_theme.load_icon(ICON_OBJECT[:-9] + '-gutter', 12, Gtk.IconLookupFlags.FORCE_SIZE).copy()  # type: ignore
         self._icon_performer = icon_theme.load_icon(ICON_PERFORMER[:-9] + '-gutter', 12, Gtk.IconLookupFlags.FORCE_SIZE).copy()  # type: ignore
         self._icon_global_script = icon_theme.load_icon(ICON_GLOBAL_SCRIPT[:-9] + '-gutter', 12, Gtk.IconLookupFlags.FORCE_SIZE).copy()  # type: ignore
+        settings = Gtk.Settings.get_for_screen(self.view.get_screen())
+        self._theme_name: str = settings.props.gtk_icon_theme_name or ''
+        self._scale = self.view.get_scale_factor()
+        GLib.idle_add(
+            prewarm_line_icons, self._theme_name, self._scale,
+            self._icon_actor, self._icon_object, self._icon_performer, self._icon_global_script
+        )
 
     def do_query_data(self, start: Gtk.TextIter, end: Gtk.TextIter, state: GtkSource.GutterRendererState):
         view: GtkSource.View = cast(GtkSource.View, self.get_view())
@@ -844,15 +1018,17 @@ class PlayIconRenderer(GtkSource.GutterRendererPixbuf):
             slot_id = -1
             if len(execution_marks) > 0:
                 _, type_id, slot_id = EXECUTION_LINE_PATTERN.match(execution_marks[0].get_name()).groups()  # type: ignore
-            self.set_pixbuf(create_breaked_line_icon(
-                int(type_id), int(slot_id), self._icon_actor, self._icon_object, self._icon_performer, self._icon_global_script
-            ))
+            self.set_pixbuf(self._line_icon(create_breaked_line_icon, int(type_id), int(slot_id)))
             return
         if len(execution_marks) > 0:
             _, type_id, slot_id = EXECUTION_LINE_PATTERN.match(execution_marks[0].get_name()).groups()  # type: ignore
             # Don't show for global
-            self.set_pixbuf(create_execution_line_icon(
-                int(type_id), int(slot_id), self._icon_actor, self._icon_object, self._icon_performer, self._icon_global_script
-            ))
+            self.set_pixbuf(self._line_icon(create_execution_line_icon, int(type_id), int(slot_id)))
             return
         self.set_pixbuf(self.empty)
+
+    def _line_icon(self, create_icon: Callable, type_id: int, slot_id: int):
+        return get_line_icon(
+            create_icon, type_id, slot_id, self._theme_name, self._scale,
+            self._icon_actor, self._icon_object, self._icon_performer, self._icon_global_script
+        )
@@ -17,11 +17,9 @@
 from __future__ import annotations
 import json
 import logging
-import math
 import os
 import sys
-from functools import partial
-from typing import Optional, List, Dict, cast
+from typing import Optional, List, Dict
 from collections.abc import Mapping, Sequence
 
 import gi
@@ -33,15 +31,23 @@ from skytemple_ssb_emulator import emulator_register_script_variable_set, emulat
     emulator_write_game_variable, emulator_sync_vars
 
 from skytemple_ssb_debugger.context.abstract import AbstractDebuggerControlContext
+from skytemple_ssb_debugger.model.variable_search_index import VariableSearchIndex
 from skytemple_files.common.i18n_util import f, _
 
-from skytemple_ssb_debugger.ui_util import builder_get_assert
+from skytemple_ssb_debugger.ui_util import builder_get_assert, create_tree_view_column, resizable
 
 gi.require_version('Gtk', '3.0')
 
 from gi.repository import Gtk
 
 logger = logging.getLogger(__name__)
+VAR_COL_ID = 0
+VAR_COL_OFFSET = 1
+VAR_COL_NAME = 2
+VAR_COL_CATEGORY = 3
+VAR_COL_VALUE = 4
+VAR_COL_IS_BIT = 5
+VAR_COL_VISIBLE = 6
 
 
 class VariableController:
@@ -89,13 +95,22 @@ class VariableController:
         self.builder = builder
         self.context = context
         self.rom_data: Pmd2Data | None = None
-        self.var_form_elements: list[list[Gtk.Widget | None] | None] | None = None
         self._suppress_events = False
         self._boost = False
         # Cached variable values
         self._variable_cache: dict[Pmd2ScriptGameVar, list[int]] = {}
         self._pending_sync = False
 
+        # All game variables are listed in a single tree view: The tree view only renders the rows on screen,
+        # instead of creating a widget for every value of every variable.
+        self._var_store: Gtk.TreeStore | None = None
+        self._var_filter: Gtk.TreeModelFilter | None = None
+        # Rows of the variables in the store. For each variable: The parent row and one child row per value
+        # (if the variable has more than one value, otherwise the value is in the parent row).
+        self._var_rows: dict[int, tuple[Gtk.TreeIter, list[Gtk.TreeIter]]] = {}
+        self._search_index: VariableSearchIndex | None = None
+        self._visible_var_ids: frozenset[int] = frozenset()
+
         self.variables_changed_but_not_saved = False
 
     def sync(self):
@@ -116,70 +131,77 @@ class VariableController:
 
     def _apply_sync(self):
         self._suppress_events = True
-        assert self.var_form_elements is not None and self.rom_data is not None
-        for i, sub in enumerate(self.var_form_elements):
-            if sub is not None:
-                for offset, el in enumerate(sub):
-                    if el is not None:
-                        val = self._variable_cache[self.rom_data.script_data.game_variables__by_id[i]][offset]
-                        if isinstance(el, Gtk.Entry):
-                            el.set_text(str(val))
-                        else:
-                            cast(Gtk.Switch, el).set_active(bool(val))
+        for var, values in self._variable_cache.items():
+            for offset, val in enumerate(values):
+                self._set_row_value(var.id, offset, val)
         builder_get_assert(self.builder, Gtk.Notebook, 'variables_notebook').set_sensitive(True)
         self._suppress_events = False
 
     def init(self, rom_data: Pmd2Data):
         self.rom_data = rom_data
-        self.var_form_elements = [None for _ in range(0, len(rom_data.script_data.game_variables))]
         notebook = builder_get_assert(self.builder, Gtk.Notebook, 'variables_notebook')
 
-        # Build the GTK form
-        for category, items in self.CATEGORIES.items():
-            tab_label = Gtk.Label.new(category)
-            tab_label.show()
-            sw: Gtk.ScrolledWindow = Gtk.ScrolledWindow.new()
-            page_grid: Gtk.Grid = Gtk.Grid.new()
-            page_grid.set_margin_bottom(5)
-            page_grid.set_margin_left(5)
-            page_grid.set_margin_top(5)
-            page_grid.set_margin_right(5)
-            sw.add(page_grid)
-            notebook.append_page(sw, tab_label)
-            row = 0
-            for item in items:
-                var: Pmd2ScriptGameVar = rom_data.script_data.game_variables__by_name[item]
-                self.var_form_elements[var.id] = [None for _ in range(0, var.nbvalues)]
-                label: Gtk.Label = Gtk.Label.new(item)
-                label.set_valign(Gtk.Align.START)
-                label.set_markup(f'<b>{item}</b>')
-                label.set_halign(Gtk.Align.START)
-                label.set_margin_top(8)
-                label.set_margin_bottom(4)
-                page_grid.attach(label, 0, row, 1, 1)
-                if var.nbvalues == 1:
-                    page_grid.attach(self.create_var_form_element(var, 0, no_label=True), 0, row + 1, 1, 1)
-                elif var.name.startswith('SCENARIO_') and var.nbvalues == 2 and var.type == GameVariableType.UINT8:
-                    sub_box: Gtk.Box = Gtk.Box.new(Gtk.Orientation.VERTICAL, 5)
-                    sub_box.set_margin_bottom(2)
-                    page_grid.attach(sub_box, 0, row + 1, 1, 1)
-                    sub_box.pack_start(self.create_var_form_element(var, 0, label='Scenario'), True, True, 0)
-                    sub_box.pack_start(self.create_var_form_element(var, 1, label='Level'), True, True, 0)
-                elif var.type == GameVariableType.BIT:
-                    sub_grid: Gtk.Grid = Gtk.Grid.new()
-                    sub_grid.set_margin_bottom(2)
-                    page_grid.attach(sub_grid, 0, row + 1, 1, 1)
-                    for i in range(0, var.nbvalues):
-                        x = i % 3
-                        y = math.floor(i / 3)
-                        sub_grid.attach(self.create_var_form_element(var, i), x, y, 1, 1)
-                else:
-                    sub_box = Gtk.Box.new(Gtk.Orientation.VERTICAL, 0)
-                    sub_box.set_margin_bottom(2)
-                    page_grid.attach(sub_box, 0, row + 1, 1, 1)
-                    for i in range(0, var.nbvalues):
-                        sub_box.pack_start(self.create_var_form_element(var, i), True, True, 0)
-                row += 2
+        categories_by_var = {
+            name: category for category, names in self.CATEGORIES.items() for name in names
+        }
+        variables = [var for var in rom_data.script_data.game_variables if not var.is_local]
+        self._search_index = VariableSearchIndex(variables)
+        self._visible_var_ids = self._search_index.all
+
+        # var id, value offset (-1 for the parent row of multi-value variables), name, category, value,
+        # is bit, visible
+        self._var_store = Gtk.TreeStore(int, int, str, str, str, bool, bool)
+        self._var_rows = {}
+        for var in variables:
+            category = categories_by_var.get(var.name, _('Other'))
+            is_bit = var.type == GameVariableType.BIT
+            if var.nbvalues == 1:
+                parent = self._var_store.append(None, [var.id, 0, var.name, category, '', is_bit, True])
+                self._var_rows[var.id] = (parent, [parent])
+            else:
+                parent = self._var_store.append(None, [var.id, -1, var.name, category, '', False, True])
+                children = []
+                for offset in range(0, var.nbvalues):
+                    children.append(self._var_store.append(parent, [
+                        var.id, offset, self._value_label(var, offset), category, '', is_bit, True
+                    ]))
+                self._var_rows[var.id] = (parent, children)
+
+        self._var_filter = self._var_store.filter_new()
+        self._var_filter.set_visible_column(VAR_COL_VISIBLE)
+
+        # Build the GTK view
+        tab_label = Gtk.Label.new(_('All Variables'))
+        tab_label.show()
+        page_box: Gtk.Box = Gtk.Box.new(Gtk.Orientation.VERTICAL, 5)
+        page_box.set_margin_bottom(5)
+        page_box.set_margin_left(5)
+        page_box.set_margin_top(5)
+        page_box.set_margin_right(5)
+        search: Gtk.SearchEntry = Gtk.SearchEntry.new()
+        search.connect('search-changed', self.on_var_search_changed)
+        page_box.pack_start(search, False, True, 0)
+
+        tree: Gtk.TreeView = Gtk.TreeView.new_with_model(self._var_filter)
+        tree.set_enable_search(False)
+        tree.append_column(resizable(create_tree_view_column(_("Name"), Gtk.CellRendererText(), text=VAR_COL_NAME)))
+        value_column = Gtk.TreeViewColumn(title=_("Value"))
+        renderer_text = Gtk.CellRendererText()
+        renderer_text.set_property('editable', True)
+        renderer_text.connect('edited', self.on_var_value_edited)
+        value_column.pack_start(renderer_text, True)
+        value_column.set_cell_data_func(renderer_text, self._cell_data_value_text)
+        renderer_toggle = Gtk.CellRendererToggle()
+        renderer_toggle.connect('toggled', self.on_var_value_toggled)
+        value_column.pack_start(renderer_toggle, False)
+        value_column.set_cell_data_func(renderer_toggle, self._cell_data_value_toggle)
+        tree.append_column(resizable(value_column))
+        tree.append_column(resizable(create_tree_view_column(_("Category"), Gtk.CellRendererText(), text=VAR_COL_CATEGORY)))
+
+        sw: Gtk.ScrolledWindow = Gtk.ScrolledWindow.new()
+        sw.add(tree)
+        page_box.pack_start(sw, True, True, 0)
+        notebook.append_page(page_box, tab_label)
 
         notebook.show_all()
         self.sync()
@@ -195,55 +217,74 @@ class VariableController:
         for _ in range(0, notebook.get_n_pages()):
             # TODO: Do the children need to be destroyed?
             notebook.remove_page(0)
+        self._var_store = None
+        self._var_filter = None
+        self._var_rows = {}
+        self._search_index = None
 
         emulator_unregister_script_variable_set()
 
-    def create_var_form_element(self, var: Pmd2ScriptGameVar, offset: int, label: str | None = None, no_label=False):
-        box: Gtk.ButtonBox = Gtk.ButtonBox.new(Gtk.Orientation.HORIZONTAL)
-        box.set_margin_bottom(2)
-        box.set_halign(Gtk.Align.END)
-        if not no_label:
-            if not label:
-                label = f'{offset}'
-            else:
-                label = f'{offset} ({label})'
-            # For bit fields, don't add extra labels.
-            if var.type != GameVariableType.BIT:
-                label_obj: Gtk.Label = Gtk.Label.new(label)
-                label_obj.set_halign(Gtk.Align.END)
-                label_obj.set_margin_right(5)
-                box.pack_start(label_obj, False, True, 0)
-        else:
-            label = ''
-        wdg: Gtk.Widget
-        if var.type == GameVariableType.BIT:
-            wgd1 = Gtk.CheckButton.new()
-            wgd1.set_label(label)
-            wgd1.connect('toggled', partial(self.on_var_changed_check, var, offset))
-            wdg = wgd1
-        else:
-            wgd2 = Gtk.Entry.new()
-            if var.type == GameVariableType.UINT32 or var.type == GameVariableType.INT32:
-                wgd2.set_width_chars(11)
-            elif var.type == GameVariableType.UINT16 or var.type == GameVariableType.INT16:
-                wgd2.set_width_chars(6)
-            else:
-                wgd2.set_width_chars(4)
-            wgd2.connect('focus-out-event', partial(self.on_var_changed_entry, var, offset))
-            wdg = wgd2
-
-        wdg.set_halign(Gtk.Align.END)
-        box.pack_start(wdg, True, True, 0)
-        self.var_form_elements[var.id][offset] = wdg  # type: ignore
-        return box
-
-    def on_var_changed_entry(self, var: Pmd2ScriptGameVar, offset: int, wdg: Gtk.Entry, *args):
+    def on_var_search_changed(self, search: Gtk.SearchEntry):
+        """Filter the variable list. Only the rows that changed their visibility are touched."""
+        if self._search_index is None or self._var_store is None:
+            return
+        new_visible = self._search_index.search(search.get_text())
+        for var_id in new_visible ^ self._visible_var_ids:
+            self._var_store[self._var_rows[var_id][0]][VAR_COL_VISIBLE] = var_id in new_visible
+        self._visible_var_ids = new_visible
+
+    @staticmethod
+    def _value_label(var: Pmd2ScriptGameVar, offset: int) -> str:
+        if var.name.startswith('SCENARIO_') and var.nbvalues == 2 and var.type == GameVariableType.UINT8:
+            return f'{offset} ({("Scenario", "Level")[offset]})'
+        return f'{offset}'
+
+    @staticmethod
+    def _cell_data_value_text(column, renderer, model, treeiter, data):
+        row = model[treeiter]
+        renderer.set_visible(not row[VAR_COL_IS_BIT] and row[VAR_COL_OFFSET] != -1)
+        renderer.set_property('text', row[VAR_COL_VALUE])
+
+    @staticmethod
+    def _cell_data_value_toggle(column, renderer, model, treeiter, data):
+        row = model[treeiter]
+        renderer.set_visible(row[VAR_COL_IS_BIT])
+        renderer.set_active(row[VAR_COL_VALUE] == '1')
+
+    def _set_row_value(self, var_id: int, offset: int, value: int):
+        if self._var_store is None or var_id not in self._var_rows:
+            return
+        rows = self._var_rows[var_id][1]
+        if offset < len(rows):
+            self._var_store[rows[offset]][VAR_COL_VALUE] = str(value)
+
+    def _var_for_filter_path(self, path: str) -> tuple[Pmd2ScriptGameVar, int]:
+        assert self._var_filter is not None and self.rom_data is not None
+        row = self._var_filter[Gtk.TreePath.new_from_string(path)]
+        return self.rom_data.script_data.game_variables__by_id[row[VAR_COL_ID]], row[VAR_COL_OFFSET]
+
+    def _value_for_filter_path(self, path: str) -> str:
+        assert self._var_filter is not None
+        return self._var_filter[Gtk.TreePath.new_from_string(path)][VAR_COL_VALUE]
+
+    def on_var_value_edited(self, renderer: Gtk.CellRendererText, path: str, text: str):
+        var, offset = self._var_for_filter_path(path)
+        if offset != -1:
+            self.on_var_changed_entry(var, offset, text)
+
+    def on_var_value_toggled(self, renderer: Gtk.CellRendererToggle, path: str):
+        var, offset = self._var_for_filter_path(path)
+        if offset != -1:
+            # The renderer is shared by all rows, so its state is not the state of this row.
+            self.on_var_changed_check(var, offset, self._value_for_filter_path(path) != '1')
+
+    def on_var_changed_entry(self, var: Pmd2ScriptGameVar, offset: int, text: str):
         if self._suppress_events:
             return
         self.variables_changed_but_not_saved = True
         try:
             try:
-                value = int(wdg.get_text())
+                value = int(text)
             except ValueError as err:
                 raise ValueError(_("The variable must have a number as value.")) from err
             if var.type == GameVariableType.BIT:
@@ -282,11 +323,11 @@ class VariableController:
         self._queue_variable_write(var.id, offset, value)
         return True
 
-    def on_var_changed_check(self, var: Pmd2ScriptGameVar, offset: int, wdg: Gtk.CheckButton, *args):
+    def on_var_changed_check(self, var: Pmd2ScriptGameVar, offset: int, active: bool):
         if self._suppress_events:
             return
         self.variables_changed_but_not_saved = True
-        self._queue_variable_write(var.id, offset, 1 if wdg.get_active() else 0)
+        self._queue_variable_write(var.id, offset, 1 if active else 0)
         return True
 
     def load(self, index: int, config_dir: str):
@@ -329,23 +370,17 @@ class VariableController:
             if var.id == var_id:
                 self._variable_cache[var][offset] = value
                 break
+        self._set_row_value(var_id, offset, value)
 
     def hook__variable_set(self, var_id, var_offset, value):
-        assert self.rom_data is not None and self.var_form_elements is not None
+        assert self.rom_data is not None
         var = self.rom_data.script_data.game_variables__by_id[var_id]
         if var not in self._variable_cache:
             if not self._pending_sync:
                 self.sync()
             return
         self._suppress_events = True
-        entry_list = self.var_form_elements[var_id]
-        if entry_list is not None:
-            entry = self.var_form_elements[var_id][var_offset]
-            if entry is not None:
-                if isinstance(entry, Gtk.Entry):
-                    entry.set_text(str(value))
-                else:
-                    entry.set_active(bool(value))
+        self._set_row_value(var_id, var_offset, value)
         self._suppress_events = False
 
     def set_boost(self, state):
@@ -16,26 +16,54 @@
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
+import argparse
 import logging
+import multiprocessing
 import os
 import sys
+from typing import TYPE_CHECKING
 
 import gi
 
 gi.require_version('Gtk', '3.0')
 
-from skytemple_icons import icons
+from skytemple_files.common.script_util import ScriptFiles, SCRIPT_DIR
 from skytemple_ssb_debugger.context.standalone import StandaloneDebuggerControlContext
-from skytemple_ssb_debugger.controller.main import MainController
-from skytemple_ssb_emulator import emulator_shutdown
+from skytemple_ssb_debugger.model.ssb_files.file_manager import SsbFileManager
+
+if TYPE_CHECKING:
+    from gi.repository import Gtk
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: list[str] | None = None):
+    # In frozen builds, the compile worker processes run this executable again. This turns them into workers
+    # (see model.ssb_files.compile_worker) instead of starting the application again.
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(
+        prog='skytemple-ssb-debugger', description='SkyTemple Script Engine Debugger'
+    )
+    parser.add_argument(
+        '--rebuild', metavar='ROM',
+        help='recompile all ExplorerScript sources of the project of the given ROM and save the ROM, without '
+             'opening a window'
+    )
+    # Unknown arguments are ignored, some launchers pass their own (eg. -psn_... on macOS).
+    args, _ = parser.parse_known_args(argv)
+    if args.rebuild is not None:
+        sys.exit(rebuild(args.rebuild))
+    run_gui()
+
+
+def run_gui():
+    # Only imported here, so that rebuilding works without a display.
+    from skytemple_icons import icons
+    from skytemple_ssb_debugger.controller.main import MainController
+    from skytemple_ssb_debugger.ui_util import builder_get_assert
+    from skytemple_ssb_emulator import emulator_shutdown
+    from gi.repository import Gtk, GLib
 
-from skytemple_ssb_debugger.ui_util import builder_get_assert
-
-from gi.repository import Gtk, GLib
-from gi.repository.Gtk import Window
-
-
-def main():
     try:
         if sys.platform.startswith('win'):
             # Load theming under Windows
@@ -48,7 +76,7 @@ def main():
 
         # Load Builder and Window
         builder = get_debugger_builder()
-        main_window = builder_get_assert(builder, Window, "main_window")
+        main_window = builder_get_assert(builder, Gtk.Window, "main_window")
         main_window.set_role("SkyTemple Script Engine Debugger")
         GLib.set_application_name("SkyTemple Script Engine Debugger")
         GLib.set_prgname("skytemple_ssb_debugger")
@@ -63,7 +91,42 @@ def main():
         emulator_shutdown()
 
 
+def rebuild(rom_filename: str) -> int:
+    """
+    Recompiles all ExplorerScript sources of the project of the given ROM and saves the ROM once.
+    Runs without any windows. Returns the exit code.
+    """
+    # The progress is logged. Does nothing, if logging was already set up.
+    logging.basicConfig(level=logging.INFO)
+    context = StandaloneDebuggerControlContext(None)
+    try:
+        context.open_rom(rom_filename)
+        ssb_fm = SsbFileManager(context)
+
+        def on_progress(nb_done: int, nb_total: int):
+            logger.info(f"Compiled {nb_done}/{nb_total} scripts.")
+
+        rebuilt = ssb_fm.rebuild(_all_ssb_filenames(context.load_script_files()), on_progress)
+    except Exception as err:
+        logger.error(f"Rebuilding {rom_filename} failed.", exc_info=err)
+        return 1
+    logger.info(f"Rebuilt {len(rebuilt)} scripts of {rom_filename}.")
+    return 0
+
+
+def _all_ssb_filenames(script_files: ScriptFiles) -> list[str]:
+    filenames = [f'{SCRIPT_DIR}/COMMON/{ssb}' for ssb in script_files['common']]
+    for map_name, map_obj in script_files['maps'].items():
+        map_ssbs = list(map_obj['enter_ssbs'])
+        map_ssbs += [ssb for _, ssb in map_obj['ssas']]
+        for ssbs in map_obj['subscripts'].values():
+            map_ssbs += ssbs
+        filenames += [f'{SCRIPT_DIR}/{map_name}/{ssb}' for ssb in map_ssbs]
+    return filenames
+
+
 def get_debugger_builder() -> Gtk.Builder:
+    from gi.repository import Gtk
     builder = Gtk.Builder()
     builder.add_from_file(os.path.join(get_debugger_package_dir(), "debugger.glade"))
     return builder
@@ -79,6 +142,7 @@ def get_debugger_data_dir():
 
 def _windows_load_theme():
     from skytemple_files.common.platform_utils.win import win_use_light_theme
+    from gi.repository import Gtk
     settings = Gtk.Settings.get_default()
     if settings is not None:
         theme_name = 'Windows-10-Dark-3.2-dark'
@@ -90,7 +154,6 @@ def _windows_load_theme():
 
 
 if __name__ == '__main__':
-    # TODO: At the moment doesn't support any cli arguments.
     logging.basicConfig()
     logging.getLogger().setLevel(logging.DEBUG)
     main()
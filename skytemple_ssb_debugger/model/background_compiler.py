@@ -0,0 +1,98 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+import logging
+import threading
+from collections.abc import Callable
+
+from gi.repository import GLib
+
+logger = logging.getLogger(__name__)
+
+# Time after the last change, before the source is compiled.
+COMPILE_DELAY_MS = 750
+
+
+class BackgroundCompiler:
+    """
+    Compiles source code in a worker thread, after it stopped changing for COMPILE_DELAY_MS.
+
+    The source is only read (using get_source, in the GTK main thread) once it is actually compiled, so scheduling
+    is cheap and can be done on every change.
+    At most one compilation runs at a time. Changes made while compiling make the running compilation stale:
+    It's result is discarded and the latest source is compiled once it finishes.
+    The result (the exception raised by check or None) is passed to on_result in the GTK main thread.
+    """
+
+    def __init__(self, get_source: Callable[[], str], check: Callable[[str], None],
+                 on_result: Callable[[BaseException | None], None]):
+        self._get_source = get_source
+        self._check = check
+        self._on_result = on_result
+        self._generation = 0
+        self._timeout_id: int | None = None
+        self._running = False
+        self._pending = False
+        self._destroyed = False
+
+    def schedule(self):
+        """Requests compiling the source. Cancels all previously scheduled or running compilations."""
+        self.cancel()
+        self._timeout_id = GLib.timeout_add(COMPILE_DELAY_MS, self._start, self._generation)
+
+    def cancel(self):
+        """Cancels all scheduled and running compilations. Their results are not reported."""
+        self._generation += 1
+        self._pending = False
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+
+    def destroy(self):
+        self.cancel()
+        self._destroyed = True
+
+    def _start(self, generation: int):
+        self._timeout_id = None
+        if generation != self._generation or self._destroyed:
+            return False
+        if self._running:
+            # Compiled once the running compilation is done.
+            self._pending = True
+            return False
+        self._running = True
+        threading.Thread(target=self._run, args=(generation, self._get_source()), daemon=True).start()
+        return False
+
+    def _run(self, generation: int, source: str):
+        result: BaseException | None = None
+        try:
+            self._check(source)
+        except Exception as err:
+            result = err
+        GLib.idle_add(self._done, generation, result)
+
+    def _done(self, generation: int, result: BaseException | None):
+        self._running = False
+        if self._destroyed:
+            return False
+        if generation == self._generation:
+            self._on_result(result)
+        elif self._pending:
+            self._pending = False
+            self._start(self._generation)
+        return False
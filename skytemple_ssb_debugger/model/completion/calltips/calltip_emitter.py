@@ -15,24 +15,32 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
-from typing import List, Optional, cast
-from collections.abc import Sequence
+from typing import List, Optional
 
 from gi.repository import GtkSource, Gtk
 
 from skytemple_files.common.ppmdu_config.script_data import Pmd2ScriptOpCode
 from skytemple_ssb_debugger.context.abstract import AbstractDebuggerControlContext
 from skytemple_ssb_debugger.model.completion.calltips.position_mark import PositionMarkEditorCalltip
+from skytemple_ssb_debugger.model.completion.opcode_index import OpcodeIndex
 from skytemple_ssb_debugger.model.completion.util import backward_until_space, backwards_until_no_space
 
 
+# Maximum number of characters before the cursor that are searched for the function call the cursor is in.
+MAX_CALLTIP_SCAN_CHARS = 2000
+# Characters that are relevant for finding the function call and argument the cursor is in.
+CALLTIP_CHARS = '(),{}<>;'
+# Context classes of the language definitions, the characters in them are not part of the code.
+IGNORED_CONTEXT_CLASSES = ('string', 'comment')
+
+
 class CalltipEmitter:
     """Provides calltips for the currently selected function (if inside the parentheses)"""
-    def __init__(self, view: GtkSource.View, opcodes: Sequence[Pmd2ScriptOpCode],
+    def __init__(self, view: GtkSource.View, opcode_index: OpcodeIndex,
                  mapname: str | None, scene_name: str, scene_type: str, context: AbstractDebuggerControlContext, is_ssbs=False):
         self.view = view
         self.buffer: GtkSource.Buffer = view.get_buffer()
-        self.opcodes = opcodes
+        self.opcode_index = opcode_index
         self.buffer.connect('notify::cursor-position', self.on_buffer_notify_cursor_position)
         self.position_mark_calltip = None
         if not is_ssbs and mapname is not None and scene_name is not None and scene_type is not None:
@@ -40,7 +48,11 @@ class CalltipEmitter:
                 view, mapname, scene_name, scene_type, context
             )
 
+        # The widgets are created once and re-used for all calltips.
         self._active_widget: GtkSource.CompletionInfo | None = None
+        self._outer_box: Gtk.Box | None = None
+        self._btn_box: Gtk.Box | None = None
+        self._labels: list[Gtk.Label] = []
         self._active_op: Pmd2ScriptOpCode | None = None
         self._active_arg: int | None = None
 
@@ -49,10 +61,9 @@ class CalltipEmitter:
         tip = self._build_calltip_data(textiter, buffer)
         if not tip:
             if self.position_mark_calltip is not None:
-                self.position_mark_calltip.reset(self._active_widget)
+                self.position_mark_calltip.reset(self._outer_box)
             if self._active_widget:
-                self._active_widget.destroy()
-                self._active_widget = None
+                self._active_widget.hide()
                 self._active_op = None
                 self._active_arg = None
             return True
@@ -60,96 +71,124 @@ class CalltipEmitter:
         op: Pmd2ScriptOpCode
         op, arg_index = tip
         if not self._active_widget:
-            self._active_widget = GtkSource.CompletionInfo.new()
-            self._active_widget.set_attached_to(self.view)
+            self._create_widget()
+        assert self._active_widget is not None and self._outer_box is not None
 
         self._active_widget.move_to_iter(self.view, textiter)
 
-        op_was_same = self._active_op == op
-        if not op_was_same:
+        if self._active_op != op or self._active_arg != arg_index:
             self._active_op = op
-            for c in self._active_widget.get_children():
-                self._active_widget.remove(c)
-
-            outer_box: Gtk.Box = Gtk.Box.new(Gtk.Orientation.VERTICAL, 4)
-            btn_box: Gtk.Box = Gtk.Box.new(Gtk.Orientation.HORIZONTAL, 4)
-            outer_box.pack_start(btn_box, True, False, 0)
-            self._active_widget.add(outer_box)
-
-        if not op_was_same or self._active_arg != arg_index:
             self._active_arg = arg_index
-            btn_box = cast(Gtk.Box, cast(Gtk.Container, self._active_widget.get_children()[0]).get_children()[0])
-            for c in btn_box.get_children():
-                btn_box.remove(c)
-            for i, arg in enumerate(op.arguments):
-                lbl: Gtk.Label = Gtk.Label.new('')
-                if arg_index == i:
-                    markup = f'<b>{arg.name}: <i>{arg.type}</i></b>, '
-                else:
-                    markup = f'<span weight="light">{arg.name}:  <i>{arg.type}</i></span>, '
-                if i == len(op.arguments) - 1 and not op.repeating_argument_group:
-                    markup = markup.rstrip(', ')
-                lbl.set_markup(markup)
-                btn_box.pack_start(lbl, True, False, 0)
-            if op.repeating_argument_group:
-                lbl = Gtk.Label.new('[')
-                btn_box.pack_start(lbl, True, False, 0)
-                for i, arg in enumerate(op.repeating_argument_group.arguments):
-                    lbl = Gtk.Label.new('')
-                    # TODO: Support highlighting individual repeating args. (not really used though)
-                    if arg_index >= len(op.arguments):
-                        markup = f'<b>{arg.name}: <i>{arg.type}</i></b>, '
-                    else:
-                        markup = f'<span weight="light">{arg.name}:  <i>{arg.type}</i></span>, '
-                    if i == len(op.repeating_argument_group.arguments) - 1:
-                        markup = markup.rstrip(', ')
-                    lbl.set_markup(markup)
-                    btn_box.pack_start(lbl, True, False, 0)
-                lbl = Gtk.Label.new('... ]')
-                btn_box.pack_start(lbl, True, False, 0)
+            self._set_markups(self._arg_markups(op, arg_index))
 
         if self.position_mark_calltip is not None:
-            self.position_mark_calltip.add_button_if_pos_mark(
-                cast(Gtk.Box, self._active_widget.get_children()[0]), buffer
-            )
+            self.position_mark_calltip.add_button_if_pos_mark(self._outer_box, buffer)
 
         self._active_widget.show_all()
 
         return True
 
+    def _create_widget(self):
+        self._active_widget = GtkSource.CompletionInfo.new()
+        self._active_widget.set_attached_to(self.view)
+        self._outer_box = Gtk.Box.new(Gtk.Orientation.VERTICAL, 4)
+        self._btn_box = Gtk.Box.new(Gtk.Orientation.HORIZONTAL, 4)
+        self._outer_box.pack_start(self._btn_box, True, False, 0)
+        self._active_widget.add(self._outer_box)
+
+    def _set_markups(self, markups: list[str]):
+        """Shows one label per markup. Labels of previous calltips are re-used, unused ones are hidden."""
+        assert self._btn_box is not None
+        while len(self._labels) < len(markups):
+            lbl: Gtk.Label = Gtk.Label.new('')
+            # Visibility is managed here, not by show_all.
+            lbl.set_no_show_all(True)
+            self._btn_box.pack_start(lbl, True, False, 0)
+            self._labels.append(lbl)
+        for lbl, markup in zip(self._labels, markups):
+            lbl.set_markup(markup)
+            lbl.show()
+        for lbl in self._labels[len(markups):]:
+            lbl.hide()
+
+    @staticmethod
+    def _arg_markups(op: Pmd2ScriptOpCode, arg_index: int) -> list[str]:
+        markups = []
+        for i, arg in enumerate(op.arguments):
+            if arg_index == i:
+                markup = f'<b>{arg.name}: <i>{arg.type}</i></b>, '
+            else:
+                markup = f'<span weight="light">{arg.name}:  <i>{arg.type}</i></span>, '
+            if i == len(op.arguments) - 1 and not op.repeating_argument_group:
+                markup = markup.rstrip(', ')
+            markups.append(markup)
+        if op.repeating_argument_group:
+            markups.append('[')
+            for i, arg in enumerate(op.repeating_argument_group.arguments):
+                # TODO: Support highlighting individual repeating args. (not really used though)
+                if arg_index >= len(op.arguments):
+                    markup = f'<b>{arg.name}: <i>{arg.type}</i></b>, '
+                else:
+                    markup = f'<span weight="light">{arg.name}:  <i>{arg.type}</i></span>, '
+                if i == len(op.repeating_argument_group.arguments) - 1:
+                    markup = markup.rstrip(', ')
+                markups.append(markup)
+            markups.append('... ]')
+        return markups
+
     def _build_calltip_data(self, textiter: Gtk.TextIter, buffer: GtkSource.Buffer):
-        cursor = textiter.copy()
+        """
+        Searches backwards from the cursor for the opening parenthesis of the function call the cursor is in.
+        Only the text of the current statement and at most MAX_CALLTIP_SCAN_CHARS before the cursor are searched.
+        Characters in strings and comments are ignored.
+        """
+        scan_start = textiter.copy()
+        scan_start.backward_chars(MAX_CALLTIP_SCAN_CHARS)
+        # Strings and comments are only known once the text was highlighted.
+        buffer.ensure_highlight(scan_start, textiter)
+        # Unlike get_text, the slice has one character for each offset in the buffer.
+        text = buffer.get_slice(scan_start, textiter, True)
+        start_offset = scan_start.get_offset()
         count_commas = 0
         count_commas_since_last_lang_string_begin_mark = 0
-        while cursor.backward_char():
-            if cursor.get_char() == ')':
+        for i in range(len(text) - 1, -1, -1):
+            char = text[i]
+            if char not in CALLTIP_CHARS or self._is_ignored(buffer, start_offset + i):
+                continue
+            if char == ')' or char == ';':
                 # We are not in a function, for sure!
                 return None
-            if cursor.get_char() == '{' or cursor.get_char() == '<':
+            if char == '{' or char == '<':
                 # Handle middle of language string or a pos marker
                 count_commas -= count_commas_since_last_lang_string_begin_mark
                 count_commas_since_last_lang_string_begin_mark = 0
-            if cursor.get_char() == '}' or cursor.get_char() == '>':
+            if char == '}' or char == '>':
                 # Handle end of language string or a pos marker
                 count_commas_since_last_lang_string_begin_mark = 0
-            if cursor.get_char() == '(':
+            if char == '(':
                 # Handle the opcode/function name
+                cursor = buffer.get_iter_at_offset(start_offset + i)
                 backwards_until_no_space(cursor)
                 backwards_until_no_inline_context(cursor)
                 backwards_until_no_space(cursor)
                 start_of_word = cursor.copy()
                 backward_until_space(start_of_word)
                 opcode_name = buffer.get_text(start_of_word, cursor, False)
-                for op in self.opcodes:
-                    if op.name == opcode_name:
-                        return op, count_commas
-                return None
-            if cursor.get_char() == ',':
+                op = self.opcode_index.by_name.get(opcode_name)
+                if op is None:
+                    return None
+                return op, count_commas
+            if char == ',':
                 # Collect commas for the arg index
                 count_commas += 1
                 count_commas_since_last_lang_string_begin_mark += 1
         return None
 
+    @staticmethod
+    def _is_ignored(buffer: GtkSource.Buffer, offset: int) -> bool:
+        it = buffer.get_iter_at_offset(offset)
+        return any(buffer.iter_has_context_class(it, context_class) for context_class in IGNORED_CONTEXT_CLASSES)
+
 
 def backwards_until_no_inline_context(it: Gtk.TextIter):
     it.backward_char()
@@ -0,0 +1,113 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+from collections.abc import Sized
+from weakref import WeakKeyDictionary
+
+from gi.repository import GtkSource
+
+from skytemple_files.common.ppmdu_config.script_data import *
+from skytemple_files.script.ssb.constants import SsbConstant
+from skytemple_ssb_debugger.model.completion.util import CompletionPrefixIndex
+from skytemple_ssb_debugger.model.constants import ICON_ACTOR, ICON_OBJECT, ICON_GLOBAL_SCRIPT
+
+_constant_indexes: WeakKeyDictionary[Pmd2ScriptData, ConstantIndex] = WeakKeyDictionary()
+
+
+def _constant_sources(script_data: Pmd2ScriptData) -> list[Sized]:
+    """The collections of the script data SsbConstant.collect_all collects the constants from."""
+    return [
+        script_data.level_entities, script_data.objects, script_data.common_routine_info, script_data.face_names,
+        script_data.face_position_modes, script_data.game_variables, script_data.level_list, script_data.menus,
+        script_data.process_specials, script_data.bgms, script_data.sprite_effects, script_data.directions
+    ]
+
+
+class ConstantIndex:
+    """
+    The constants of a ROM, shared by the completion of all editors.
+    Use get_for to get the index for some script data.
+
+    The index is built again if any of the lists of the script data the constants come from was replaced or changed
+    its length. Other changes to the script data (eg. renaming an entry) must be announced with invalidate.
+    """
+
+    def __init__(self, constants: list[SsbConstant], sources: list[Sized]):
+        self.constants = constants
+        # The collections the constants were collected from and their lengths at that time.
+        self._sources = [(source, len(source)) for source in sources]
+        self._completion: CompletionPrefixIndex | None = None
+
+    @classmethod
+    def get_for(cls, script_data: Pmd2ScriptData) -> ConstantIndex:
+        index = _constant_indexes.get(script_data)
+        sources = _constant_sources(script_data)
+        if index is None or not index._is_up_to_date(sources):
+            index = cls(list(SsbConstant.collect_all(script_data)), sources)
+            _constant_indexes[script_data] = index
+        return index
+
+    @classmethod
+    def invalidate(cls, script_data: Pmd2ScriptData):
+        """Must be called after the script data was changed, so that the constants are collected again."""
+        _constant_indexes.pop(script_data, None)
+
+    def _is_up_to_date(self, sources: list[Sized]) -> bool:
+        return len(sources) == len(self._sources) and all(
+            source is old_source and len(source) == old_len
+            for source, (old_source, old_len) in zip(sources, self._sources)
+        )
+
+    @property
+    def completion(self) -> CompletionPrefixIndex:
+        """Completion proposals for all constants."""
+        if self._completion is None:
+            self._completion = CompletionPrefixIndex(
+                (const.name, self._build_item(const)) for const in self.constants
+            )
+        return self._completion
+
+    @staticmethod
+    def _build_item(const: SsbConstant) -> GtkSource.CompletionItem:
+        item: GtkSource.CompletionItem = GtkSource.CompletionItem.new()
+        item.set_text(const.name)
+        item.set_label(const.name)
+
+        if isinstance(const.value, Pmd2ScriptEntity):
+            item.set_icon_name(ICON_ACTOR)
+        elif isinstance(const.value, Pmd2ScriptObject):
+            item.set_icon_name(ICON_OBJECT)
+        elif isinstance(const.value, Pmd2ScriptRoutine):
+            item.set_icon_name(ICON_GLOBAL_SCRIPT)
+        elif isinstance(const.value, Pmd2ScriptFaceName):
+            item.set_icon_name('skytemple-e-sprite-symbolic')
+        elif isinstance(const.value, Pmd2ScriptFacePositionMode):
+            item.set_icon_name('skytemple-e-position-symbolic')
+        elif isinstance(const.value, Pmd2ScriptGameVar):
+            item.set_icon_name('skytemple-e-variable-symbolic')
+        elif isinstance(const.value, Pmd2ScriptLevel):
+            item.set_icon_name('skytemple-e-ground-symbolic')
+        elif isinstance(const.value, Pmd2ScriptMenu):
+            item.set_icon_name('skytemple-e-menu-symbolic')
+        elif isinstance(const.value, Pmd2ScriptSpecial):
+            item.set_icon_name('skytemple-e-special-symbolic')
+        elif isinstance(const.value, Pmd2ScriptDirection):
+            item.set_icon_name('skytemple-move-symbolic')
+        elif isinstance(const.value, Pmd2ScriptSpriteEffect):
+            item.set_icon_name('skytemple-e-event-symbolic')
+
+        return item
@@ -20,11 +20,10 @@ from collections.abc import Iterable
 from gi.repository import GObject, GtkSource, Gtk
 
 from skytemple_files.common.ppmdu_config.data import Pmd2Data
-from skytemple_files.common.ppmdu_config.script_data import *
 from skytemple_files.script.ssb.constants import SsbConstant
+from skytemple_ssb_debugger.model.completion.constant_index import ConstantIndex
 from skytemple_ssb_debugger.model.completion.util import common_do_match, common_do_populate, \
     backward_until_special_char
-from skytemple_ssb_debugger.model.constants import ICON_ACTOR, ICON_OBJECT, ICON_GLOBAL_SCRIPT
 from skytemple_files.common.i18n_util import _
 
 
@@ -34,8 +33,13 @@ class GtkSourceCompletionSsbConstants(GObject.Object, GtkSource.CompletionProvid
         self.constant_source = rom_data.script_data
 
     @property
-    def all_constants(self):
-        return list(SsbConstant.collect_all(self.constant_source))
+    def constant_index(self) -> ConstantIndex:
+        # Looked up every time, since the index is replaced if the script data changed.
+        return ConstantIndex.get_for(self.constant_source)
+
+    @property
+    def all_constants(self) -> list[SsbConstant]:
+        return self.constant_index.constants
 
     def do_get_name(self) -> str:
         return _("Constants & Variables")
@@ -81,37 +85,7 @@ class GtkSourceCompletionSsbConstants(GObject.Object, GtkSource.CompletionProvid
         return common_do_populate(self, self._filter, self._all, context)
 
     def _all(self) -> Iterable[GtkSource.CompletionProposal]:
-        return [self._build_item(s) for s in self.all_constants]
+        return self.constant_index.completion.all()
 
     def _filter(self, cond: str) -> Iterable[GtkSource.CompletionProposal]:
-        return [self._build_item(s) for s in self.all_constants if s.name.startswith(cond)]
-
-    def _build_item(self, const: SsbConstant) -> GtkSource.CompletionItem:
-        item: GtkSource.CompletionItem = GtkSource.CompletionItem.new()
-        item.set_text(const.name)
-        item.set_label(const.name)
-
-        if isinstance(const.value, Pmd2ScriptEntity):
-            item.set_icon_name(ICON_ACTOR)
-        elif isinstance(const.value, Pmd2ScriptObject):
-            item.set_icon_name(ICON_OBJECT)
-        elif isinstance(const.value, Pmd2ScriptRoutine):
-            item.set_icon_name(ICON_GLOBAL_SCRIPT)
-        elif isinstance(const.value, Pmd2ScriptFaceName):
-            item.set_icon_name('skytemple-e-sprite-symbolic')
-        elif isinstance(const.value, Pmd2ScriptFacePositionMode):
-            item.set_icon_name('skytemple-e-position-symbolic')
-        elif isinstance(const.value, Pmd2ScriptGameVar):
-            item.set_icon_name('skytemple-e-variable-symbolic')
-        elif isinstance(const.value, Pmd2ScriptLevel):
-            item.set_icon_name('skytemple-e-ground-symbolic')
-        elif isinstance(const.value, Pmd2ScriptMenu):
-            item.set_icon_name('skytemple-e-menu-symbolic')
-        elif isinstance(const.value, Pmd2ScriptSpecial):
-            item.set_icon_name('skytemple-e-special-symbolic')
-        elif isinstance(const.value, Pmd2ScriptDirection):
-            item.set_icon_name('skytemple-move-symbolic')
-        elif isinstance(const.value, Pmd2ScriptSpriteEffect):
-            item.set_icon_name('skytemple-e-event-symbolic')
-        
-        return item
+        return self.constant_index.completion.starting_with(cond)
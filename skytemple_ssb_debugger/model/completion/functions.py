@@ -20,15 +20,15 @@ from collections.abc import Iterable
 
 from gi.repository import GObject, GtkSource, Gtk
 
-from skytemple_files.common.ppmdu_config.script_data import Pmd2ScriptOpCode
+from skytemple_ssb_debugger.model.completion.opcode_index import OpcodeIndex
 from skytemple_ssb_debugger.model.completion.util import common_do_match, common_do_populate
 from skytemple_files.common.i18n_util import _
 
 
 class GtkSourceCompletionSsbFunctions(GObject.Object, GtkSource.CompletionProvider): # type: ignore
-    def __init__(self, opcodes: list[Pmd2ScriptOpCode]):
+    def __init__(self, opcode_index: OpcodeIndex):
         super().__init__()
-        self.opcodes = opcodes
+        self.opcode_index = opcode_index
 
     def do_get_name(self) -> str:
         return _("Functions")
@@ -70,14 +70,7 @@ class GtkSourceCompletionSsbFunctions(GObject.Object, GtkSource.CompletionProvid
         return common_do_populate(self, self._filter, self._all, context)
 
     def _all(self) -> Iterable[GtkSource.CompletionProposal]:
-        return [self._build_item(opcode) for opcode in self.opcodes]
+        return self.opcode_index.completion.all()
 
     def _filter(self, cond: str) -> Iterable[GtkSource.CompletionProposal]:
-        return [self._build_item(opcode) for opcode in self.opcodes if opcode.name.startswith(cond)]
-
-    def _build_item(self, opcode: Pmd2ScriptOpCode) -> GtkSource.CompletionItem:
-        item: GtkSource.CompletionItem = GtkSource.CompletionItem.new()
-        item.set_text(opcode.name)
-        item.set_label(opcode.name)
-        item.set_info(opcode.description)
-        return item
+        return self.opcode_index.completion.starting_with(cond)
@@ -0,0 +1,66 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+from collections.abc import Sequence
+from weakref import WeakKeyDictionary
+
+from gi.repository import GtkSource
+
+from skytemple_files.common.ppmdu_config.script_data import Pmd2ScriptData, Pmd2ScriptOpCode
+from skytemple_ssb_debugger.model.completion.util import CompletionPrefixIndex, filter_special_exps_opcodes
+
+_opcode_indexes: WeakKeyDictionary[Pmd2ScriptData, OpcodeIndex] = WeakKeyDictionary()
+
+
+class OpcodeIndex:
+    """
+    Lookup of the opcodes of a ROM, shared by the completion and calltips of all editors.
+    Use get_for to get the index for some script data.
+    """
+
+    def __init__(self, opcodes: Sequence[Pmd2ScriptOpCode]):
+        self.opcodes = opcodes
+        self.by_name: dict[str, Pmd2ScriptOpCode] = {}
+        for opcode in opcodes:
+            # If names are duplicated, the first one wins, like when searching the list.
+            self.by_name.setdefault(opcode.name, opcode)
+        self._completion: CompletionPrefixIndex | None = None
+
+    @classmethod
+    def get_for(cls, script_data: Pmd2ScriptData) -> OpcodeIndex:
+        index = _opcode_indexes.get(script_data)
+        if index is None:
+            index = cls(script_data.op_codes)
+            _opcode_indexes[script_data] = index
+        return index
+
+    @property
+    def completion(self) -> CompletionPrefixIndex:
+        """Completion proposals for all opcodes that can be called as functions in ExplorerScript."""
+        if self._completion is None:
+            self._completion = CompletionPrefixIndex(
+                (opcode.name, self._build_item(opcode)) for opcode in filter_special_exps_opcodes(self.opcodes)
+            )
+        return self._completion
+
+    @staticmethod
+    def _build_item(opcode: Pmd2ScriptOpCode) -> GtkSource.CompletionItem:
+        item: GtkSource.CompletionItem = GtkSource.CompletionItem.new()
+        item.set_text(opcode.name)
+        item.set_label(opcode.name)
+        item.set_info(opcode.description)
+        return item
@@ -16,8 +16,9 @@
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 import string
+from bisect import bisect_left
 from typing import List
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 
 from gi.repository import GtkSource, Gtk
 
@@ -25,6 +26,31 @@ from explorerscript.ssb_converting.ssb_special_ops import OPS_ALL_SPECIAL
 from skytemple_files.common.ppmdu_config.script_data import Pmd2ScriptOpCode
 
 SPECIAL_CHARS_COMPLETION_START = string.whitespace + r"""!"#%&'()*+,-./:;<=>?@[\]^`{|}~"""
+# Sorts after all characters, so prefix + PREFIX_END is greater than all strings starting with prefix.
+PREFIX_END = chr(0x10FFFF)
+
+
+class CompletionPrefixIndex:
+    """
+    Prebuilt completion proposals, sorted by their names so that the proposals starting with a prefix can be
+    found by bisecting, instead of checking and building all proposals on every keystroke.
+    """
+    def __init__(self, proposals: Iterable[tuple[str, GtkSource.CompletionProposal]]):
+        proposals = list(proposals)
+        # In the original order
+        self._all = [proposal for _, proposal in proposals]
+        proposals.sort(key=lambda entry: entry[0])
+        self._names = [name for name, _ in proposals]
+        self._sorted = [proposal for _, proposal in proposals]
+
+    def all(self) -> list[GtkSource.CompletionProposal]:
+        return self._all
+
+    def starting_with(self, prefix: str) -> list[GtkSource.CompletionProposal]:
+        """Returns the proposals with names starting with prefix, ordered by name."""
+        start = bisect_left(self._names, prefix)
+        end = bisect_left(self._names, prefix + PREFIX_END, start)
+        return self._sorted[start:end]
 
 
 
@@ -83,7 +109,9 @@ def common_do_populate(obj, filter_func, all_func, context: GtkSource.Completion
         start_word = textiter.copy()
         backward_until_special_char(start_word)
         word = buffer.get_text(start_word, textiter, False)
+        # Only the matching proposals, so GtkSource doesn't have to filter all of them on every keystroke.
         context.add_proposals(obj, filter_func(word), True)
+        return
     context.add_proposals(obj, all_func(), True)
 
 
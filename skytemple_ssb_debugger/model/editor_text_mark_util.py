@@ -21,37 +21,72 @@ from collections.abc import Iterable
 
 from gi.repository import GtkSource, Gtk
 
-CATEGORY_OPCODE = "opcode"
+from skytemple_ssb_debugger.model.opcode_line_index import OpcodeLineIndex
+
 CATEGORY_BREAKPOINT = "breakpoint"
 MARK_PATTERN = re.compile('opcode_<<<(.*)>>>_(\\d+)(?:_(.*))?')
 
 
 class EditorTextMarkUtil:
-    """A static utility class for managing the op related text/source marks in a GtkSource.Buffer."""
+    """
+    A static utility class for managing the op related text/source marks in a GtkSource.Buffer.
+    The positions of the opcodes are not stored as marks, but in an OpcodeLineIndex for the buffer.
+    """
+    @classmethod
+    def add_line_mark_for_op(cls, b: GtkSource.Buffer, index: OpcodeLineIndex, ssb_filename: str, opcode_addr: int, name: str, category: str, is_for_macro_call: bool):
+        i = cls._get_opcode_iter(b, index, ssb_filename, opcode_addr, is_for_macro_call)
+        if i is not None:
+            b.create_source_mark(name, category, i)
+
     @classmethod
-    def add_line_mark_for_op(cls, b: GtkSource.Buffer, ssb_filename: str, opcode_addr: int, name: str, category: str, is_for_macro_call: bool):
-        m = cls._get_opcode_mark(b, ssb_filename, opcode_addr, is_for_macro_call)
+    def set_line_mark_for_op(cls, b: GtkSource.Buffer, index: OpcodeLineIndex, ssb_filename: str, opcode_addr: int, name: str, category: str, is_for_macro_call: bool):
+        """Like add_line_mark_for_op, but moves the mark with the given name, if it already exists."""
+        m = b.get_mark(name)
+        i = cls._get_opcode_iter(b, index, ssb_filename, opcode_addr, is_for_macro_call)
+        if i is None:
+            if m is not None:
+                b.delete_mark(m)
+        elif m is None:
+            b.create_source_mark(name, category, i)
+        else:
+            b.move_mark(m, i)
+
+    @classmethod
+    def remove_line_mark(cls, b: GtkSource.Buffer, name: str):
+        m = b.get_mark(name)
         if m is not None:
-            b.create_source_mark(name, category, b.get_iter_at_mark(m))
+            b.delete_mark(m)
 
     @classmethod
     def remove_all_line_marks(cls, b: GtkSource.Buffer, category: str):
         b.remove_source_marks(b.get_start_iter(), b.get_end_iter(), category)
 
     @classmethod
-    def scroll_to_op(cls, b: GtkSource.Buffer, view: GtkSource.View, ssb_filename: str, opcode_addr: int, is_for_macro_call: bool):
-        m = cls._get_opcode_mark(b, ssb_filename, opcode_addr, is_for_macro_call)
-        if m is not None:
-            view.scroll_to_mark(m, 0.1, False, 0.1, 0.1)
-            b.place_cursor(b.get_iter_at_mark(m))
+    def scroll_to_op(cls, b: GtkSource.Buffer, index: OpcodeLineIndex, view: GtkSource.View, ssb_filename: str, opcode_addr: int, is_for_macro_call: bool):
+        i = cls._get_opcode_iter(b, index, ssb_filename, opcode_addr, is_for_macro_call)
+        if i is not None:
+            b.place_cursor(i)
+            view.scroll_to_mark(b.get_insert(), 0.1, False, 0.1, 0.1)
 
     @classmethod
     def get_line_marks_for(cls, b: GtkSource.Buffer, line: int, category: str) -> list[GtkSource.Mark]:
         return b.get_source_marks_at_line(line, category)
 
     @classmethod
-    def get_opcodes_in_line(cls, b: GtkSource.Buffer, line: int) -> Iterable[tuple[str, int]]:
-        return cls._get_opcode_in_line(b, line)
+    def get_lines_with_marks(cls, b: GtkSource.Buffer, category: str) -> list[int]:
+        """Returns the lines that have marks of the category, by jumping from mark to mark."""
+        lines = []
+        i = b.get_start_iter()
+        if len(b.get_source_marks_at_iter(i, category)) > 0:
+            lines.append(i.get_line())
+        while b.forward_iter_to_source_mark(i, category):
+            if len(lines) < 1 or lines[-1] != i.get_line():
+                lines.append(i.get_line())
+        return lines
+
+    @classmethod
+    def get_opcodes_in_line(cls, index: OpcodeLineIndex, line: int) -> Iterable[tuple[str, int]]:
+        return index.opcodes_in_line(line)
 
     @classmethod
     def extract_opcode_data_from_line_mark(cls, mark: GtkSource.Mark) -> tuple[str, int]:
@@ -62,16 +97,16 @@ class EditorTextMarkUtil:
         return str(match.group(1)), int(match.group(2))
 
     @classmethod
-    def add_breakpoint_line_mark(cls, b: GtkSource.Buffer, ssb_filename: str, opcode_offset: int):
-        ms = []
-        m = cls._get_opcode_mark(b, ssb_filename, opcode_offset, True)
-        if m is not None:
-            ms.append(m)
-        m = cls._get_opcode_mark(b, ssb_filename, opcode_offset, False)
-        if m is not None:
-            ms.append(m)
-        for i, m in enumerate(ms):
-            line_iter = b.get_iter_at_line(b.get_iter_at_mark(m).get_line())
+    def add_breakpoint_line_mark(cls, b: GtkSource.Buffer, index: OpcodeLineIndex, ssb_filename: str, opcode_offset: int):
+        positions = []
+        p = index.position_of(ssb_filename, opcode_offset, True)
+        if p is not None:
+            positions.append(p)
+        p = index.position_of(ssb_filename, opcode_offset, False)
+        if p is not None:
+            positions.append(p)
+        for i, (line, _) in enumerate(positions):
+            line_iter = b.get_iter_at_line(line)
             lm = b.get_mark(f'for:opcode_<<<{ssb_filename}>>>_{opcode_offset}_{i}')
             if lm is not None:
                 return
@@ -88,35 +123,20 @@ class EditorTextMarkUtil:
             b.remove_source_marks(b.get_iter_at_mark(m), b.get_iter_at_mark(m), CATEGORY_BREAKPOINT)
 
     @classmethod
-    def create_opcode_mark(cls, b: GtkSource.Buffer, ssb_filename: str,
-                           offset: int, line: int, col: int, is_for_macro_call: bool):
-        if col == 0:
-            # XXX: Bug in GtkSourceView 4. Placing it at col 0 will cause it to hang. It shouldn't be a big issue in most cases.
-            col = 1
-        textiter = b.get_iter_at_line_offset(line, col)
-        macro_call_suffix = '_call' if is_for_macro_call else ''
-        b.create_source_mark(f'opcode_<<<{ssb_filename}>>>_{offset}{macro_call_suffix}', CATEGORY_OPCODE, textiter)
-
-    @classmethod
-    def _get_opcode_mark(cls, b: GtkSource.Buffer, ssb_filename: str, opcode_addr: int, is_for_macro_call: bool) -> Gtk.TextMark | None:
-        if is_for_macro_call:
-            return b.get_mark(f'opcode_<<<{ssb_filename}>>>_{opcode_addr}_call')
-        else:
-            return b.get_mark(f'opcode_<<<{ssb_filename}>>>_{opcode_addr}')
+    def create_opcode_marks(cls, index: OpcodeLineIndex, marks: Iterable[tuple[str, int, int, int, bool]]):
+        """Adds the opcodes (ssb_filename, offset, line, col, is_for_macro_call) to the index, all at once."""
+        # XXX: Bug in GtkSourceView 4. Placing source marks for the opcode at col 0 will cause it to hang. It shouldn't be a big issue in most cases.
+        index.add_many(
+            (ssb_filename, offset, line, col if col != 0 else 1, is_for_macro_call)
+            for ssb_filename, offset, line, col, is_for_macro_call in marks
+        )
 
     @classmethod
-    def _get_opcode_in_line(cls, buffer: GtkSource.Buffer, line) -> list[tuple[str, int]]:
-        i = buffer.get_iter_at_line(line)
-        marks = []
-        while i.get_line() == line:
-            marks_at_pos = buffer.get_source_marks_at_iter(i, CATEGORY_OPCODE)
-            for m in marks_at_pos:
-                match = MARK_PATTERN.match(not_none(m.get_name()))
-                assert match
-                marks.append((str(match.group(1)), int(match.group(2))))
-            if not i.forward_char():  # TODO: the other forwards might also work!
-                return marks
-        return marks
+    def _get_opcode_iter(cls, b: GtkSource.Buffer, index: OpcodeLineIndex, ssb_filename: str, opcode_addr: int, is_for_macro_call: bool) -> Gtk.TextIter | None:
+        p = index.position_of(ssb_filename, opcode_addr, is_for_macro_call)
+        if p is None:
+            return None
+        return b.get_iter_at_line_offset(*p)
 
 
 T = TypeVar('T')
@@ -0,0 +1,123 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+from collections.abc import Iterator
+
+
+def _trigrams(text: str) -> Iterator[str]:
+    for i in range(0, len(text) - 2):
+        yield text[i:i + 3]
+
+
+class FileTreeSearchIndex:
+    """
+    Search index over the labels of the entries of the SSB file tree.
+
+    Entries are identified by integer IDs and form a tree, just like the rows in the file tree view. The labels are
+    stored lowercase and indexed by their trigrams, so that substring queries only need to check the entries that
+    contain all trigrams of the query.
+    """
+
+    def __init__(self):
+        self._labels: dict[int, str] = {}
+        self._parents: dict[int, int | None] = {}
+        self._children: dict[int | None, list[int]] = {None: []}
+        self._trigrams: dict[str, set[int]] = {}
+        self._next_id = 0
+
+    def clear(self):
+        self._labels = {}
+        self._parents = {}
+        self._children = {None: []}
+        self._trigrams = {}
+
+    def add(self, label: str, parent: int | None) -> int:
+        """Adds a new entry as child of parent (or as root entry if None). Returns the ID of the new entry."""
+        entry_id = self._next_id
+        self._next_id += 1
+        label = label.lower()
+        self._labels[entry_id] = label
+        self._parents[entry_id] = parent
+        self._children[entry_id] = []
+        self._children[parent].append(entry_id)
+        for trigram in _trigrams(label):
+            self._trigrams.setdefault(trigram, set()).add(entry_id)
+        return entry_id
+
+    def remove(self, entry_id: int) -> list[int]:
+        """Removes an entry and all of it's descendants. Returns the IDs of all removed entries."""
+        removed = [entry_id, *self.descendants(entry_id)]
+        self._children[self._parents[entry_id]].remove(entry_id)
+        for removed_id in removed:
+            for trigram in _trigrams(self._labels[removed_id]):
+                self._trigrams[trigram].discard(removed_id)
+            del self._labels[removed_id]
+            del self._parents[removed_id]
+            del self._children[removed_id]
+        return removed
+
+    def all(self) -> set[int]:
+        return set(self._labels.keys())
+
+    def parent(self, entry_id: int) -> int | None:
+        return self._parents[entry_id]
+
+    def has_children(self, entry_id: int) -> bool:
+        return len(self._children[entry_id]) > 0
+
+    def ancestors(self, entry_id: int) -> Iterator[int]:
+        parent = self._parents[entry_id]
+        while parent is not None:
+            yield parent
+            parent = self._parents[parent]
+
+    def root(self, entry_id: int) -> int:
+        """Returns the root entry that entry_id is a descendant of (or entry_id itself)."""
+        for ancestor in self.ancestors(entry_id):
+            entry_id = ancestor
+        return entry_id
+
+    def descendants(self, entry_id: int) -> Iterator[int]:
+        stack = list(self._children[entry_id])
+        while stack:
+            child = stack.pop()
+            yield child
+            stack.extend(self._children[child])
+
+    def matches(self, query: str) -> set[int]:
+        """Returns the IDs of all entries whose label contains query."""
+        query = query.lower()
+        if len(query) < 3:
+            return {entry_id for entry_id, label in self._labels.items() if query in label}
+        candidate_sets = sorted((self._trigrams.get(trigram, set()) for trigram in set(_trigrams(query))), key=len)
+        candidates = candidate_sets[0].intersection(*candidate_sets[1:])
+        return {entry_id for entry_id in candidates if query in self._labels[entry_id]}
+
+    def search(self, query: str) -> tuple[set[int], set[int]]:
+        """
+        Returns the IDs of all entries whose label contains query and the IDs of all entries that should be
+        visible for this query: The matches, their ancestors and their descendants.
+        """
+        matches = self.matches(query)
+        visible = set(matches)
+        for entry_id in matches:
+            for ancestor in self.ancestors(entry_id):
+                if ancestor in visible:
+                    break
+                visible.add(ancestor)
+            visible.update(self.descendants(entry_id))
+        return matches, visible
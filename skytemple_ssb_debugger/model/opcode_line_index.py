@@ -0,0 +1,128 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+
+# (ssb file name, opcode offset, is for macro call)
+OpcodeKey = tuple[str, int, bool]
+# (line, column)
+Position = tuple[int, int]
+
+
+class OpcodeLineIndex:
+    """
+    Bidirectional index between the opcodes of SSB files and their positions in the text of an editor.
+
+    The positions are kept in a list sorted by line and column, so that the opcodes of a line can be found by
+    bisecting. Text edits never change the order of the positions, so they are updated in place by insert and delete,
+    which must be called for every change of the text. Like text marks, opcodes at the position text is inserted at
+    stay in front of it. Opcodes in a deleted range are removed.
+    """
+
+    def __init__(self):
+        self._positions: list[Position] = []
+        self._keys: list[OpcodeKey] = []
+        # Index of each key in the lists above. Rebuilt when needed after entries were added or removed.
+        self._index_of: dict[OpcodeKey, int] = {}
+        self._index_of_valid = True
+        # Added but not yet sorted in
+        self._pending: list[tuple[Position, OpcodeKey]] = []
+
+    def clear(self):
+        self._positions = []
+        self._keys = []
+        self._index_of = {}
+        self._index_of_valid = True
+        self._pending = []
+
+    def add(self, ssb_filename: str, opcode_offset: int, line: int, column: int, is_for_macro_call: bool):
+        self._pending.append(((line, column), (ssb_filename, opcode_offset, is_for_macro_call)))
+
+    def add_many(self, entries: Iterable[tuple[str, int, int, int, bool]]):
+        """Adds multiple opcodes. Entries are tuples of the arguments of add."""
+        self._pending.extend(
+            ((line, column), (ssb_filename, opcode_offset, is_for_macro_call))
+            for ssb_filename, opcode_offset, line, column, is_for_macro_call in entries
+        )
+
+    def position_of(self, ssb_filename: str, opcode_offset: int, is_for_macro_call: bool) -> Position | None:
+        """Returns the line and column of the opcode, or None if it is not in the text."""
+        self._sort_pending()
+        if not self._index_of_valid:
+            self._index_of = {key: i for i, key in enumerate(self._keys)}
+            self._index_of_valid = True
+        i = self._index_of.get((ssb_filename, opcode_offset, is_for_macro_call))
+        if i is None:
+            return None
+        return self._positions[i]
+
+    def opcodes_in_line(self, line: int) -> list[tuple[str, int]]:
+        """Returns the SSB file names and offsets of all opcodes in the line, ordered by column."""
+        self._sort_pending()
+        start = bisect_left(self._positions, (line, 0))
+        end = bisect_left(self._positions, (line + 1, 0), start)
+        return [(key[0], key[1]) for key in self._keys[start:end]]
+
+    def insert(self, start: Position, end: Position):
+        """Text was inserted at start. After the insertion, it's end is at end."""
+        self._sort_pending()
+        start_line, start_col = start
+        end_line, end_col = end
+        lines_added = end_line - start_line
+        positions = self._positions
+        for i in range(bisect_right(positions, start), len(positions)):
+            line, col = positions[i]
+            if line == start_line:
+                positions[i] = (end_line, end_col + col - start_col)
+            elif lines_added == 0:
+                break
+            else:
+                positions[i] = (line + lines_added, col)
+
+    def delete(self, start: Position, end: Position):
+        """The text between start and end is about to be deleted."""
+        self._sort_pending()
+        start_line, start_col = start
+        end_line, end_col = end
+        lines_removed = end_line - start_line
+        positions = self._positions
+        first = bisect_left(positions, start)
+        after = bisect_right(positions, end, first)
+        if after > first:
+            del positions[first:after]
+            del self._keys[first:after]
+            self._index_of_valid = False
+        for i in range(first, len(positions)):
+            line, col = positions[i]
+            if line == end_line:
+                positions[i] = (start_line, start_col + col - end_col)
+            elif lines_removed == 0:
+                break
+            else:
+                positions[i] = (line - lines_removed, col)
+
+    def _sort_pending(self):
+        if not self._pending:
+            return
+        entries = list(zip(self._positions, self._keys))
+        entries.extend(self._pending)
+        entries.sort(key=lambda entry: entry[0])
+        self._positions = [position for position, _ in entries]
+        self._keys = [key for _, key in entries]
+        self._pending = []
+        self._index_of_valid = False
@@ -0,0 +1,151 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+import json
+import logging
+import os
+import struct
+
+from ndspy.rom import NintendoDSRom
+from skytemple_files.common.util import open_utf8
+
+logger = logging.getLogger(__name__)
+
+# Offsets of header fields that point to regions of the ROM that are not covered by the FAT:
+# ARM9, ARM7, FNT, FAT, ARM9 overlay table, ARM7 overlay table, icon/banner.
+HEADER_REGION_OFFSETS = (0x20, 0x30, 0x40, 0x48, 0x50, 0x58, 0x68)
+HEADER_FAT_OFFSET = 0x48
+HEADER_FAT_SIZE = 0x4C
+HEADER_TOTAL_ROM_SIZE = 0x80
+PADDING_BYTE = b'\xFF'
+
+
+def repack_state_path(debugger_dir: str, rom_filename: str) -> str:
+    return os.path.join(debugger_dir, f'{os.path.basename(rom_filename)}.repacked.json')
+
+
+def store_repack_state(rom_filename: str, state_path: str):
+    """Records that the ROM file, as it is now, was written by the debugger."""
+    stat = os.stat(rom_filename)
+    try:
+        with open_utf8(state_path, 'w') as f:
+            json.dump({'size': stat.st_size, 'mtime': stat.st_mtime_ns}, f)
+    except OSError:
+        logger.warning(f"Failed writing {state_path}.", exc_info=True)
+
+
+def rom_needs_repack(rom_filename: str, state_path: str) -> bool:
+    """Whether the ROM file changed since it was last written by the debugger."""
+    try:
+        with open_utf8(state_path, 'r') as f:
+            state = json.load(f)
+        stat = os.stat(rom_filename)
+        return state['size'] != stat.st_size or state['mtime'] != stat.st_mtime_ns
+    except (OSError, ValueError, KeyError, TypeError):
+        return True
+
+
+class RomPersistence:
+    """
+    Write-behind persistence of a ROM to it's file.
+
+    Files that were changed in the ROM model are marked dirty. On flush, all dirty files are patched directly into
+    the ROM file, as long as they still fit into the space allocated to them in the FAT. Only if that is not possible
+    (or the file table of the ROM changed) the entire ROM is written again.
+
+    If a repack state path is given, the repack state (see store_repack_state) is updated after every write, since
+    the ROM file is then still packed by the debugger.
+    """
+
+    def __init__(self, rom: NintendoDSRom, filename: str, repack_state_path: str | None = None):
+        self.rom = rom
+        self.filename = filename
+        self.repack_state_path = repack_state_path
+        self._dirty: set[int] = set()
+
+    def mark_dirty(self, rom_path: str):
+        """Marks the file with the given path in the ROM as changed."""
+        fid = self.rom.filenames.idOf(rom_path)
+        if fid is None:
+            raise ValueError(f'Cannot find file ID of "{rom_path}"')
+        self._dirty.add(fid)
+
+    def is_dirty(self) -> bool:
+        return len(self._dirty) > 0
+
+    def flush(self):
+        """Writes all dirty files to the ROM file."""
+        if not self._dirty:
+            return
+        if not self._try_patch():
+            logger.debug(f"Dirty files don't fit into {self.filename}, writing entire ROM.")
+            self.save_full()
+            return
+        self._dirty = set()
+        self._store_repack_state()
+
+    def save_full(self):
+        """Writes the entire ROM. This also persists all dirty files."""
+        self.rom.saveToFile(self.filename, updateDeviceCapacity=True)
+        self._dirty = set()
+        self._store_repack_state()
+
+    def _store_repack_state(self):
+        if self.repack_state_path is not None:
+            store_repack_state(self.filename, self.repack_state_path)
+
+    def _try_patch(self) -> bool:
+        """Tries to patch all dirty files into the ROM file in place. Returns False if this is not possible."""
+        with open(self.filename, 'r+b') as f:
+            header = f.read(0x200)
+            if len(header) < 0x200:
+                return False
+            fat_offset, fat_size = struct.unpack_from('<II', header, HEADER_FAT_OFFSET)
+            if fat_size != 8 * len(self.rom.files):
+                return False
+            f.seek(fat_offset)
+            fat_data = f.read(fat_size)
+            if len(fat_data) != fat_size:
+                return False
+            fat = [struct.unpack_from('<II', fat_data, i) for i in range(0, fat_size, 8)]
+
+            region_starts = {start for start, end in fat if end > start}
+            region_starts.update(struct.unpack_from('<I', header, offset)[0] for offset in HEADER_REGION_OFFSETS)
+            region_starts.add(struct.unpack_from('<I', header, HEADER_TOTAL_ROM_SIZE)[0])
+            region_starts.add(os.fstat(f.fileno()).st_size)
+            sorted_starts = sorted(region_starts)
+
+            # Check first, so that the ROM file is not left half-patched.
+            patches = []
+            for fid in self._dirty:
+                start, end = fat[fid]
+                data = self.rom.files[fid]
+                limit = next((s for s in sorted_starts if s > start), start)
+                if start < 0x200 or start + len(data) > limit:
+                    return False
+                patches.append((fid, start, end, data))
+
+            for fid, start, old_end, data in patches:
+                new_end = start + len(data)
+                f.seek(start)
+                f.write(data)
+                if old_end > new_end:
+                    f.write(PADDING_BYTE * (old_end - new_end))
+                f.seek(fat_offset + 8 * fid)
+                f.write(struct.pack('<II', start, new_end))
+        logger.debug(f"Patched {len(patches)} file(s) into {self.filename}.")
+        return True
@@ -22,6 +22,9 @@ from collections.abc import Callable
 from skytemple_ssb_debugger.context.abstract import AbstractDebuggerControlContext
 from skytemple_ssb_debugger.model.ssb_files.file import SsbLoadedFile
 
+# (ssb_filename, opcode_offset, line, column, is_for_macro_call)
+OpcodeTextMark = tuple[str, int, int, int, bool]
+
 
 class AbstractScriptFileContext(ABC):
     """TODO Doc"""
@@ -34,12 +37,15 @@ class AbstractScriptFileContext(ABC):
         # Notifies of a ssb being reloaded in RAM
         # (ssb_filename) -> None
         self._on_ssbs_reload: Callable[[str], None] | None = None
-        # Notifies of added opcodes to create markers for
-        # (ssb_filename, opcode_offset, line, column, is_for_macro_call) -> None
-        self._do_insert_opcode_text_mark: Callable[[str, int, int, int, bool], None] | None = None
+        # Notifies of added opcodes to create markers for, all at once
+        # (list of (ssb_filename, opcode_offset, line, column, is_for_macro_call)) -> None
+        self._do_insert_opcode_text_marks: Callable[[list[OpcodeTextMark]], None] | None = None
         # Requests opcode text marks to be deleted
         # () -> None
         self._do_clear_opcode_text_marks: Callable[[], None] | None = None
+        # Notifies of the progress of saving, if saving requires recompiling multiple ssb files.
+        # (nb_done, nb_total) -> None
+        self._on_save_progress: Callable[[int, int], None] | None = None
 
     def destroy(self):
         self._unregister_ssb_handlers()
@@ -53,9 +59,12 @@ class AbstractScriptFileContext(ABC):
     def register_clear_opcode_text_mark_handler(self, handler: Callable[[], None] | None):
         self._do_clear_opcode_text_marks = handler
 
-    def register_insert_opcode_text_mark_handler(self,
-                                                 handler: Callable[[str, int, int, int, bool], None] | None):
-        self._do_insert_opcode_text_mark = handler
+    def register_insert_opcode_text_marks_handler(self,
+                                                  handler: Callable[[list[OpcodeTextMark]], None] | None):
+        self._do_insert_opcode_text_marks = handler
+
+    def register_save_progress_handler(self, handler: Callable[[int, int], None] | None):
+        self._on_save_progress = handler
 
     @property
     @abstractmethod
@@ -95,6 +104,12 @@ class AbstractScriptFileContext(ABC):
              success_callback: Callable[[], None]):
         pass
 
+    def check(self, text: str):
+        """
+        Compiles the given source code, without saving anything, to check it for errors. Raises the errors
+        save would report. Contexts that can not check their source code do nothing. May be called from any thread.
+        """
+
     @abstractmethod
     def on_ssb_changed_externally(self, ssb_filename, ready_to_reload):
         """
@@ -30,7 +30,7 @@ from explorerscript.source_map import MacroSourceMapping
 from skytemple_files.common.project_file_manager import EXPLORERSCRIPT_INCLUSION_MAP_SUFFIX
 from skytemple_files.common.util import open_utf8
 from skytemple_ssb_debugger.context.abstract import AbstractDebuggerControlContext
-from skytemple_ssb_debugger.model.script_file_context.abstract import AbstractScriptFileContext
+from skytemple_ssb_debugger.model.script_file_context.abstract import AbstractScriptFileContext, OpcodeTextMark
 from skytemple_ssb_debugger.model.ssb_files.file import SsbLoadedFile
 from skytemple_ssb_debugger.model.ssb_files.file_manager import SsbFileManager
 from skytemple_files.common.i18n_util import f, _
@@ -98,6 +98,7 @@ class ExpsMacroFileScriptFileContext(AbstractScriptFileContext):
         logger.debug(f"Loading ExplorerScript file.")
 
         def load_thread():
+            opcode_text_marks: list[OpcodeTextMark] = []
             try:
                 # 1. Load the epxs file
                 exps_source, _ = self._ssb_fm.project_fm.explorerscript_load(self._relative_path, sourcemap=False)
@@ -126,35 +127,22 @@ class ExpsMacroFileScriptFileContext(AbstractScriptFileContext):
                 GLib.idle_add(partial(
                     load_view_callback, exps_source, 'exps'
                 ))
+                # 3. Compare the hashes of the ssb files and check the state,
+                #    of the loaded ssb files. If hashes match and is breakable
+                #    prepare opcode markers for the buffer
+                for loaded_ssb in self._registered_ssbs:
+                    if self._is_breakable(loaded_ssb):
+                        opcode_text_marks += self._opcode_text_marks(loaded_ssb)
 
-            GLib.idle_add(partial(self._after_load, after_callback))
+            GLib.idle_add(partial(self._after_load, after_callback, opcode_text_marks))
 
         threading.Thread(target=load_thread).start()
 
-    def _after_load(self, after_callback: Callable[[], None]):
-        # 3. Compare the hashes of the ssb files and check the state,
-        #    of the loaded ssb files. If hashes match and is breakable
-        #    add opcode markers to the buffer
+    def _after_load(self, after_callback: Callable[[], None], opcode_text_marks: list[OpcodeTextMark]):
+        # 4. Add the opcode markers to the buffer
         logger.debug(f"Loaded. Loading in opcode marks.")
-        if self._do_insert_opcode_text_mark:
-            for loaded_ssb in self._registered_ssbs:
-                if self._is_breakable(loaded_ssb):
-                    for opcode_offset, source_mapping in loaded_ssb.exps.source_map:
-                        if isinstance(source_mapping, MacroSourceMapping) and self._sm_entry_is_for_us(
-                                loaded_ssb, source_mapping.relpath_included_file
-                        ):
-                            self._do_insert_opcode_text_mark(
-                                loaded_ssb.filename, opcode_offset,
-                                source_mapping.line, source_mapping.column, False
-                            )
-                        # Also insert opcode text marks for macro calls
-                        if isinstance(source_mapping, MacroSourceMapping) and source_mapping.called_in and source_mapping.called_in:
-                            cin_fn, cin_line, cin_col = source_mapping.called_in
-                            if self._sm_entry_is_for_us(loaded_ssb, cin_fn):
-                                self._do_insert_opcode_text_mark(
-                                    loaded_ssb.filename, opcode_offset,
-                                    cin_line, cin_col, True
-                                )
+        if self._do_insert_opcode_text_marks:
+            self._do_insert_opcode_text_marks(opcode_text_marks)
         logger.debug(f"Loaded. Triggering callback.")
         after_callback()
 
@@ -162,10 +150,14 @@ class ExpsMacroFileScriptFileContext(AbstractScriptFileContext):
              success_callback: Callable[[], None]):
         logger.debug(f"Saving ExlorerScript macro.")
 
+        def on_progress(nb_done: int, nb_total: int):
+            if self._on_save_progress:
+                GLib.idle_add(partial(self._on_save_progress, nb_done, nb_total))
+
         def save_thread():
             try:
                 ready_to_reload_list, included_exps_files_list = self._ssb_fm.save_explorerscript_macro(
-                    self._absolute_path, save_text, self._registered_ssbs
+                    self._absolute_path, save_text, self._registered_ssbs, on_progress
                 )
             except Exception as err:
                 logger.error(f"Error on save.", exc_info=err)
@@ -197,6 +189,27 @@ class ExpsMacroFileScriptFileContext(AbstractScriptFileContext):
                 logger.debug(f"After save: MACRO - READY TO RELOAD NOW {loaded_ssb.filename}")
                 self._ssb_fm.force_reload(loaded_ssb.filename)
 
+    def _opcode_text_marks(self, loaded_ssb: SsbLoadedFile) -> list[OpcodeTextMark]:
+        """Returns the opcode text marks for the opcodes of the SSB file that are in this macro file."""
+        marks: list[OpcodeTextMark] = []
+        for opcode_offset, source_mapping in loaded_ssb.exps.source_map:
+            if isinstance(source_mapping, MacroSourceMapping) and self._sm_entry_is_for_us(
+                    loaded_ssb, source_mapping.relpath_included_file
+            ):
+                marks.append((
+                    loaded_ssb.filename, opcode_offset,
+                    source_mapping.line, source_mapping.column, False
+                ))
+            # Also insert opcode text marks for macro calls
+            if isinstance(source_mapping, MacroSourceMapping) and source_mapping.called_in:
+                cin_fn, cin_line, cin_col = source_mapping.called_in
+                if self._sm_entry_is_for_us(loaded_ssb, cin_fn):
+                    marks.append((
+                        loaded_ssb.filename, opcode_offset,
+                        cin_line, cin_col, True
+                    ))
+        return marks
+
     def on_ssb_changed_externally(self, ssb_filename, ready_to_reload):
         loaded_ssb = None
         for candidate in self._registered_ssbs:
@@ -206,24 +219,9 @@ class ExpsMacroFileScriptFileContext(AbstractScriptFileContext):
         if loaded_ssb is not None:
             logger.error(f"SSB file {ssb_filename} for Macro {self.exps_filepath} was changed externally... Loading opcodes...")
             # Insert the new text marks
-            if self._do_insert_opcode_text_mark and self._do_clear_opcode_text_marks:
+            if self._do_insert_opcode_text_marks and self._do_clear_opcode_text_marks:
                 self._do_clear_opcode_text_marks()
-                for opcode_offset, source_mapping in loaded_ssb.exps.source_map:
-                    if isinstance(source_mapping, MacroSourceMapping) and self._sm_entry_is_for_us(
-                            loaded_ssb, source_mapping.relpath_included_file
-                    ):
-                        self._do_insert_opcode_text_mark(
-                            ssb_filename, opcode_offset,
-                            source_mapping.line, source_mapping.column, False
-                        )
-                    # Also insert opcode text marks for macro calls
-                    if isinstance(source_mapping, MacroSourceMapping) and source_mapping.called_in and source_mapping.called_in:
-                        cin_fn, cin_line, cin_col = source_mapping.called_in
-                        if self._sm_entry_is_for_us(loaded_ssb, cin_fn):
-                            self._do_insert_opcode_text_mark(
-                                loaded_ssb.filename, opcode_offset,
-                                cin_line, cin_col, True
-                            )
+                self._do_insert_opcode_text_marks(self._opcode_text_marks(loaded_ssb))
             if ready_to_reload and not self._we_triggered_the_reload:
                 logger.error(f"READY TO RELOAD.")
                 self._ssb_fm.force_reload(ssb_filename)
@@ -26,7 +26,7 @@ from gi.repository import GLib
 
 from explorerscript.source_map import MacroSourceMapping
 from skytemple_ssb_debugger.context.abstract import AbstractDebuggerControlContext
-from skytemple_ssb_debugger.model.script_file_context.abstract import AbstractScriptFileContext
+from skytemple_ssb_debugger.model.script_file_context.abstract import AbstractScriptFileContext, OpcodeTextMark
 from skytemple_ssb_debugger.model.ssb_files.explorerscript import SsbHashError
 from skytemple_ssb_debugger.model.ssb_files.file import SsbLoadedFile
 
@@ -106,6 +106,7 @@ class SsbFileScriptFileContext(AbstractScriptFileContext):
                 load_view_callback(self._ssb_file.exps.text, 'exps')
 
         def load_thread():
+            opcode_text_marks = None
             try:
                 logger.debug(f"Loading ExplorerScript.")
                 self._ssb_file.exps.load()
@@ -120,29 +121,18 @@ class SsbFileScriptFileContext(AbstractScriptFileContext):
                 GLib.idle_add(partial(
                     load_view_callback, self._ssb_file.exps.text, 'exps'
                 ))
-            GLib.idle_add(partial(self._after_load, after_callback))
+                # The text marks are prepared here, so that the GTK thread only has to insert them.
+                opcode_text_marks = self._opcode_text_marks()
+            GLib.idle_add(partial(self._after_load, after_callback, opcode_text_marks))
 
         threading.Thread(target=load_thread).start()
 
-    def _after_load(self, after_callback: Callable[[], None]):
+    def _after_load(self, after_callback: Callable[[], None], opcode_text_marks: list[OpcodeTextMark] | None = None):
         logger.debug(f"Loaded. Loading in opcode marks.")
-        if self._do_insert_opcode_text_mark:
-            source_map = self._ssb_file.exps.source_map
-            if source_map is not None:
-                for opcode_offset, source_mapping in source_map:
-                    if not isinstance(source_mapping, MacroSourceMapping) or source_mapping.relpath_included_file is None:
-                        self._do_insert_opcode_text_mark(
-                            self._ssb_file.filename, opcode_offset,
-                            source_mapping.line, source_mapping.column, False
-                        )
-                    # Also insert opcode text marks for macro calls
-                    if isinstance(source_mapping, MacroSourceMapping) and source_mapping.called_in:
-                        cin_fn, cin_line, cin_col = source_mapping.called_in
-                        if cin_fn is None:
-                            self._do_insert_opcode_text_mark(
-                                self._ssb_file.filename, opcode_offset,
-                                cin_line, cin_col, True
-                                )
+        if self._do_insert_opcode_text_marks:
+            if opcode_text_marks is None:
+                opcode_text_marks = self._opcode_text_marks()
+            self._do_insert_opcode_text_marks(opcode_text_marks)
         logger.debug(f"Loaded. Triggering callback.")
         after_callback()
 
@@ -166,11 +156,21 @@ class SsbFileScriptFileContext(AbstractScriptFileContext):
                 return
             else:
                 logger.debug(f"Saving SSB: Success.")
-                GLib.idle_add(partial(self._after_save, ready_to_reload, included_exps_files, success_callback))
+                opcode_text_marks = self._opcode_text_marks()
+                GLib.idle_add(partial(
+                    self._after_save, ready_to_reload, included_exps_files, success_callback, opcode_text_marks
+                ))
 
         threading.Thread(target=save_thread).start()
 
-    def _after_save(self, ready_to_reload, included_exps_files, success_callback: Callable[[], None]):
+    def check(self, text: str):
+        assert self._ssb_file.file_manager is not None
+        self._ssb_file.file_manager.compiler.compile_explorerscript_serialized(
+            text, self.exps_filepath, persist=False
+        )
+
+    def _after_save(self, ready_to_reload, included_exps_files, success_callback: Callable[[], None],
+                    opcode_text_marks: list[OpcodeTextMark] | None = None):
         if included_exps_files is not None:
             for exps_abs_path in included_exps_files:
                 logger.debug(f"After save: Inform inclusion of macro {exps_abs_path}.")
@@ -178,24 +178,11 @@ class SsbFileScriptFileContext(AbstractScriptFileContext):
 
         logger.debug(f"After save: Build text marks for opcodes...")
         # Insert the new text marks
-        if self._do_insert_opcode_text_mark and self._do_clear_opcode_text_marks:
+        if self._do_insert_opcode_text_marks and self._do_clear_opcode_text_marks:
+            if opcode_text_marks is None:
+                opcode_text_marks = self._opcode_text_marks()
             self._do_clear_opcode_text_marks()
-            source_map = self._ssb_file.exps.source_map
-            if source_map is not None:
-                for opcode_offset, source_mapping in source_map:
-                    if not isinstance(source_mapping, MacroSourceMapping) or source_mapping.relpath_included_file is None:
-                        self._do_insert_opcode_text_mark(
-                            self._ssb_file.filename, opcode_offset,
-                            source_mapping.line, source_mapping.column, False
-                        )
-                    # Also insert opcode text marks for macro calls
-                    if isinstance(source_mapping, MacroSourceMapping) and source_mapping.called_in:
-                        cin_fn, cin_line, cin_col = source_mapping.called_in
-                        if cin_fn is None:
-                            self._do_insert_opcode_text_mark(
-                                self._ssb_file.filename, opcode_offset,
-                                cin_line, cin_col, True
-                                )
+            self._do_insert_opcode_text_marks(opcode_text_marks)
 
         logger.debug(f"After save: Triggering callback...")
         success_callback()
@@ -204,6 +191,28 @@ class SsbFileScriptFileContext(AbstractScriptFileContext):
             assert self._ssb_file.file_manager is not None
             self._ssb_file.file_manager.force_reload(self._ssb_file.filename)
 
+    def _opcode_text_marks(self) -> list[OpcodeTextMark]:
+        """Returns the opcode text marks for the current source map. Does not need to be called in the GTK thread."""
+        marks: list[OpcodeTextMark] = []
+        source_map = self._ssb_file.exps.source_map
+        if source_map is None:
+            return marks
+        for opcode_offset, source_mapping in source_map:
+            if not isinstance(source_mapping, MacroSourceMapping) or source_mapping.relpath_included_file is None:
+                marks.append((
+                    self._ssb_file.filename, opcode_offset,
+                    source_mapping.line, source_mapping.column, False
+                ))
+            # Also insert opcode text marks for macro calls
+            if isinstance(source_mapping, MacroSourceMapping) and source_mapping.called_in:
+                cin_fn, cin_line, cin_col = source_mapping.called_in
+                if cin_fn is None:
+                    marks.append((
+                        self._ssb_file.filename, opcode_offset,
+                        cin_line, cin_col, True
+                    ))
+        return marks
+
     def on_ssb_changed_externally(self, ssb_filename, ready_to_reload):
         if ssb_filename == self._ssb_file.filename:
             logger.debug(f"{ssb_filename} was changed externally, simulating save.")
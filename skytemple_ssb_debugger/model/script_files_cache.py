@@ -0,0 +1,120 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+
+from ndspy.fnt import Folder
+from skytemple_files.common.script_util import ScriptFiles, MapEntry, SSA_EXT, SSB_EXT, ENTER_SSE
+from skytemple_files.common.util import open_utf8
+
+logger = logging.getLogger(__name__)
+
+
+def script_folder_hash(folder: Folder) -> str:
+    """Hash over the file table of the SCRIPT folder. Changes whenever a file or directory is added or removed."""
+    h = hashlib.sha256()
+    h.update(str(folder.firstID).encode('ascii'))
+    stack: list[tuple[str, Folder]] = [('', folder)]
+    while stack:
+        path, current = stack.pop()
+        for filename in current.files:
+            h.update(f'{path}/{filename}\0'.encode('utf-8'))
+        for dirname, subfolder in current.folders:
+            h.update(f'{path}/{dirname}/\0'.encode('utf-8'))
+            stack.append((f'{path}/{dirname}', subfolder))
+    return h.hexdigest()
+
+
+class ScriptFilesCache:
+    """
+    Persists the script files information (see skytemple_files.common.script_util.load_script_files) of a ROM
+    in a JSON file. The information is stored together with the hash of the SCRIPT folder it was loaded from
+    and only returned if the hash still matches.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, folder_hash: str) -> ScriptFiles | None:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open_utf8(self.path, 'r') as f:
+                data = json.load(f)
+            if data['hash'] != folder_hash:
+                return None
+            script_files: ScriptFiles = data['script_files']
+            for map_obj in script_files['maps'].values():
+                map_obj['ssas'] = [(ssa, ssb) for ssa, ssb in map_obj['ssas']]
+            return script_files
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning(f"Invalid script files cache {self.path}, ignoring.", exc_info=True)
+            return None
+
+    def save(self, folder_hash: str, script_files: ScriptFiles):
+        try:
+            with open_utf8(self.path, 'w') as f:
+                json.dump({'hash': folder_hash, 'script_files': script_files}, f)
+        except OSError:
+            logger.warning(f"Failed writing script files cache {self.path}.", exc_info=True)
+
+    def add_script(self, old_hash: str, new_hash: str, ssb_path: str, mapname: str, scene_type: str, scene_name: str):
+        """
+        Adds an SSB file to the cached information, if it is up to date (matches old_hash),
+        and stores it for new_hash. ssb_path is relative to the SCRIPT folder.
+        """
+        script_files = self.load(old_hash)
+        if script_files is None:
+            return
+        ssb = ssb_path.split('/')[-1]
+        if mapname not in script_files['maps']:
+            script_files['maps'][mapname] = MapEntry(
+                name=mapname, enter_sse=None, enter_ssbs=[], subscripts={}, lsd=None, ssas=[]
+            )
+        map_obj = script_files['maps'][mapname]
+        if scene_type == 'sse':
+            map_obj['enter_sse'] = ENTER_SSE
+            map_obj['enter_ssbs'].append(ssb)
+        elif scene_type == 'ssa':
+            map_obj['ssas'].append((ssb[:-len(SSB_EXT)] + SSA_EXT, ssb))
+        elif scene_type == 'sss':
+            map_obj['subscripts'].setdefault(scene_name, []).append(ssb)
+        self.save(new_hash, script_files)
+
+    def remove_script(self, old_hash: str, new_hash: str, ssb_path: str):
+        """
+        Removes an SSB file from the cached information, if it is up to date (matches old_hash),
+        and stores it for new_hash. ssb_path is relative to the SCRIPT folder.
+        """
+        script_files = self.load(old_hash)
+        if script_files is None:
+            return
+        dirname, ssb = ssb_path.split('/')[-2:]
+        if dirname in script_files['maps']:
+            map_obj = script_files['maps'][dirname]
+            if ssb in map_obj['enter_ssbs']:
+                map_obj['enter_ssbs'].remove(ssb)
+            map_obj['ssas'] = [(ssa, x) for ssa, x in map_obj['ssas'] if x != ssb]
+            for ssbs in map_obj['subscripts'].values():
+                if ssb in ssbs:
+                    ssbs.remove(ssb)
+        elif ssb in script_files['common']:
+            script_files['common'].remove(ssb)
+        self.save(new_hash, script_files)
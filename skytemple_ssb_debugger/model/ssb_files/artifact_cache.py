@@ -0,0 +1,122 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+from importlib.metadata import version, PackageNotFoundError
+from collections.abc import Iterable
+
+from skytemple_files.common.ppmdu_config.data import Pmd2Data
+from skytemple_files.common.util import open_utf8
+from skytemple_files.script.ssb.constants import SsbConstant
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_CACHE_DIR_NAME = 'compiled'
+
+
+def static_data_version(static_data: Pmd2Data) -> str:
+    """
+    Hash over everything compiling ExplorerScript depends on, other than the source files: The game edition,
+    the opcodes, the constants and the versions of the compilers.
+    """
+    h = hashlib.sha256()
+    for package in ('skytemple-files', 'explorerscript'):
+        try:
+            h.update(f'{package}={version(package)}\0'.encode('utf-8'))
+        except PackageNotFoundError:
+            h.update(f'{package}\0'.encode('utf-8'))
+    h.update(f'{static_data.game_edition}\0'.encode('utf-8'))
+    for op in static_data.script_data.op_codes:
+        h.update(f'{op.id}:{op.name}:{op.params}:{op.arguments}:{op.repeating_argument_group}\0'.encode('utf-8'))
+    for constant in SsbConstant.collect_all(static_data.script_data):
+        h.update(f'{constant.name}={getattr(constant.value, "id", constant.value)}\0'.encode('utf-8'))
+    return h.hexdigest()
+
+
+def _file_hash(path: str) -> str | None:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class ArtifactCache:
+    """
+    Persists the results of compiling ExplorerScript files in the project's debugger directory.
+
+    There is one entry per ExplorerScript file. It stores the hash of the source the result was compiled from,
+    the hashes of all files that were imported and the version of the static data. An entry is only used if all
+    of them still match.
+    """
+
+    def __init__(self, directory: str, static_data_version: str):
+        self.directory = directory
+        self.static_data_version = static_data_version
+
+    def load(self, exps_filename: str, source_hash: str) -> tuple[list[str], bytes, str] | None:
+        """
+        Returns the imported files, the SSB binary data and the serialized source map compiled from the source with
+        the given hash, if they are cached and still up to date.
+        """
+        path = self._path_for(exps_filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open_utf8(path, 'r') as f:
+                data = json.load(f)
+            if data['source_hash'] != source_hash or data['static_data_version'] != self.static_data_version:
+                return None
+            for dependency, dependency_hash in data['dependencies']:
+                if _file_hash(dependency) != dependency_hash:
+                    return None
+            return (
+                [dependency for dependency, _ in data['dependencies']],
+                base64.b64decode(data['ssb']), data['source_map']
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning(f"Invalid compiled script cache entry {path}, ignoring.", exc_info=True)
+            return None
+
+    def store(self, exps_filename: str, source_hash: str, dependencies: Iterable[str], ssb_bin: bytes, source_map: str):
+        path = self._path_for(exps_filename)
+        data = {
+            'exps': exps_filename,
+            'source_hash': source_hash,
+            'static_data_version': self.static_data_version,
+            'dependencies': [[dependency, _file_hash(dependency)] for dependency in dependencies],
+            'ssb': base64.b64encode(ssb_bin).decode('ascii'),
+            'source_map': source_map,
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first, other processes may read the entry at the same time.
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open_utf8(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning(f"Failed writing compiled script cache entry {path}.", exc_info=True)
+
+    def _path_for(self, exps_filename: str) -> str:
+        name = hashlib.sha256(os.path.abspath(exps_filename).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{name}.json')
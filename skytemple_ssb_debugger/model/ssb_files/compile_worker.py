@@ -0,0 +1,64 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+"""
+Compiling ExplorerScript in worker processes. This module is imported by the worker processes, so it must not
+import Gtk or any other part of the UI.
+
+The workers are spawned by running the Python executable again. In frozen builds (eg. PyInstaller), this is the
+application itself, so applications using the debugger must call multiprocessing.freeze_support() first thing
+in their entry point, like skytemple_ssb_debugger.main.main does.
+"""
+from __future__ import annotations
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from skytemple_files.common.ppmdu_config.data import Pmd2Data
+from skytemple_ssb_debugger.model.ssb_files.artifact_cache import ArtifactCache
+from skytemple_ssb_debugger.model.ssb_files.compiler_service import ExplorerScriptCompilerService
+
+_compiler: ExplorerScriptCompilerService | None = None
+
+
+def _init_worker(static_data: Pmd2Data, lookup_paths: list[str], artifact_cache: ArtifactCache | None):
+    global _compiler
+    _compiler = ExplorerScriptCompilerService(static_data, lookup_paths, artifact_cache)
+
+
+def compile_explorerscript(code: str, exps_filename: str) -> tuple[bytes, str]:
+    """
+    Compiles ExplorerScript in a worker process.
+    Returns the binary SSB data and the serialized source map, so that no models have to be passed between processes.
+    """
+    assert _compiler is not None
+    compiled = _compiler.compile_explorerscript_serialized(code, exps_filename)
+    return compiled.ssb_bin, compiled.source_map
+
+
+def create_compile_pool(compiler: ExplorerScriptCompilerService, nb_jobs: int) -> ProcessPoolExecutor | None:
+    """
+    Returns a process pool for compile_explorerscript, with workers set up like the given compiler, or None if
+    compiling the given number of jobs in parallel is not worth starting worker processes.
+    """
+    max_workers = min(nb_jobs, os.cpu_count() or 1)
+    if max_workers < 2:
+        return None
+    # Worker processes are spawned, since forking a process running Gtk is not safe.
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker, initargs=(compiler.static_data, compiler.lookup_paths, compiler.artifact_cache)
+    )
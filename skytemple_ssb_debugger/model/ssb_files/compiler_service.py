@@ -0,0 +1,265 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import threading
+from copy import deepcopy
+from threading import Lock
+from typing import NamedTuple
+from collections.abc import Iterable
+
+from explorerscript.error import ParseError, SsbCompilerError
+from explorerscript.macro import ExplorerScriptMacro
+from explorerscript.source_map import SourceMap
+from explorerscript.ssb_converting.compiler.utils import UserDefinedConstants
+from explorerscript.ssb_converting.ssb_compiler import ExplorerScriptSsbCompiler
+from skytemple_files.common.ppmdu_config.data import Pmd2Data
+from skytemple_files.common.types.file_types import FileType
+from skytemple_files.script.ssb.constants import SsbConstant
+from skytemple_files.script.ssb.model import Ssb
+from skytemple_files.script.ssb.script_compiler import ScriptCompiler
+from skytemple_files.user_error import USER_ERROR_MARK
+from skytemple_ssb_debugger.model.ssb_files.artifact_cache import ArtifactCache
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of compiled macro files that are kept in memory.
+MAX_CACHED_MACRO_FILES = 128
+
+# (path, mtime_ns, size, directory of the original base file, imports leading to the file,
+#  constants before the file was compiled, name of the performance progress list variable)
+MacroCacheKey = tuple[str, int, int, str, tuple[str, ...], str, str]
+# (path, mtime_ns, size) of a file imported while compiling
+DependencyStamp = tuple[str, int, int]
+# (macros, constants after the file was compiled, files imported by the file)
+MacroCacheEntry = tuple[dict[str, ExplorerScriptMacro], UserDefinedConstants, tuple[DependencyStamp, ...]]
+
+# The cache is shared by all compilers of this process. All inputs of compiling a macro file are part of the key,
+# except for the files imported by it, which are checked when using an entry.
+_macro_cache: dict[MacroCacheKey, MacroCacheEntry] = {}
+_macro_cache_lock = Lock()
+
+# Collects the dependency stamps of the compilation currently running in this thread.
+_compile_state = threading.local()
+
+
+def dependency_stamp(path: str) -> DependencyStamp | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+def _record_dependencies(stamps: Iterable[DependencyStamp]):
+    dependencies: list[DependencyStamp] | None = getattr(_compile_state, 'dependencies', None)
+    if dependencies is not None:
+        dependencies.extend(stamps)
+
+
+def _is_up_to_date(stamps: Iterable[DependencyStamp]) -> bool:
+    return all(dependency_stamp(stamp[0]) == stamp for stamp in stamps)
+
+
+def _constants_key(user_constants: UserDefinedConstants) -> str:
+    return repr((
+        user_constants.global_constants, user_constants.funcdef_constants, user_constants.macrodefdef_constants
+    ))
+
+
+class _CachingExplorerScriptSsbCompiler(ExplorerScriptSsbCompiler):
+    """
+    ExplorerScript compiler that takes the results of compiling imported macro files from a cache, if the file
+    did not change since it was compiled. Compilers for imported files are created by the compiler that imports them
+    using it's own class, so this applies to all files imported directly or indirectly.
+
+    The result of compiling a macro file only depends on the directory of the script file that imports it (for the
+    relative paths in the source map), not on the script file itself, so scripts in the same directory share entries.
+    Importing the script file itself always fails, since it contains routines.
+    """
+    def compile(
+            self, explorerscript_src: str, file_name: str, macros_only: bool = False,
+            original_base_file: str | None = None
+    ) -> ExplorerScriptSsbCompiler:
+        if not macros_only or original_base_file is None:
+            return super().compile(explorerscript_src, file_name, macros_only, original_base_file)
+        stamp = dependency_stamp(file_name)
+        if stamp is None:
+            return super().compile(explorerscript_src, file_name, macros_only, original_base_file)
+        key = (
+            *stamp, os.path.dirname(original_base_file),
+            tuple(self.recursion_check[1:]), _constants_key(self.user_constants),
+            self.performance_progress_list_var_name
+        )
+        with _macro_cache_lock:
+            entry = _macro_cache.get(key)
+        if entry is not None and _is_up_to_date(entry[2]):
+            logger.debug(f"<{id(self)}> Using cached macros of {file_name}.")
+            # The compilers modify both the macros and constants in place, so never hand out the cached objects.
+            self.macros, self.user_constants = deepcopy((entry[0], entry[1]))
+            _record_dependencies((stamp, *entry[2]))
+            return self
+
+        outer_dependencies = getattr(_compile_state, 'dependencies', None)
+        _compile_state.dependencies = []
+        try:
+            super().compile(explorerscript_src, file_name, macros_only, original_base_file)
+            imported = tuple(_compile_state.dependencies)
+        finally:
+            _compile_state.dependencies = outer_dependencies
+        _record_dependencies((stamp, *imported))
+        entry = (*deepcopy((self.macros, self.user_constants)), imported)
+        with _macro_cache_lock:
+            if len(_macro_cache) >= MAX_CACHED_MACRO_FILES:
+                _macro_cache.clear()
+            _macro_cache[key] = entry
+        return self
+
+
+class CompiledExplorerScript(NamedTuple):
+    """The serialized result of compiling an ExplorerScript file, together with what it depended on."""
+    source_hash: str
+    dependencies: tuple[DependencyStamp, ...]
+    ssb_bin: bytes
+    source_map: str
+
+    def is_up_to_date(self, source_hash: str) -> bool:
+        """Whether compiling the source with the given hash would still produce this result."""
+        return source_hash == self.source_hash and _is_up_to_date(self.dependencies)
+
+
+class ExplorerScriptCompilerService:
+    """
+    Long-lived compiler for the ExplorerScript files of a project. Re-uses the same script compiler for all files and
+    caches the results of compiling imported macro files, keyed by their path and modification time, so that
+    repeatedly compiling scripts only processes the macro files that changed.
+    If an artifact cache is given, results are also persisted there and re-used across sessions.
+    Is threadsafe.
+    """
+
+    def __init__(self, static_data: Pmd2Data, lookup_paths: list[str], artifact_cache: ArtifactCache | None = None):
+        self.static_data = static_data
+        self.lookup_paths = lookup_paths
+        self.artifact_cache = artifact_cache
+        self._compiler = ScriptCompiler(static_data)
+        self._performance_progress_list_var_name = SsbConstant.create_for(
+            static_data.script_data.game_variables__by_name['PERFORMANCE_PROGRESS_LIST']
+        ).name
+        # Result of the last successful compilation of each file and whether it is in the artifact cache.
+        self._last_compiled: dict[str, tuple[CompiledExplorerScript, bool]] = {}
+        self._last_compiled_lock = Lock()
+
+    @staticmethod
+    def source_hash(code: str) -> str:
+        return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+    def compile_explorerscript(self, code: str, exps_filename: str) -> tuple[Ssb, SourceMap]:
+        """
+        Compile ExplorerScript into a SSB model. See ScriptCompiler.compile_explorerscript.
+        If neither the source code nor any of the files it imports changed since the file was last compiled,
+        the previous result is returned without compiling again.
+
+        :raises: ParseError: On parsing errors
+        :raises: SsbCompilerError: On logical compiling errors (eg. unknown opcodes)
+        :raises: ValueError: On misc. logical compiling errors (eg. unknown constants)
+        """
+        compiled = self.compile_explorerscript_serialized(code, exps_filename)
+        return FileType.SSB.deserialize(compiled.ssb_bin, self.static_data), SourceMap.deserialize(compiled.source_map)
+
+    def compile_explorerscript_serialized(self, code: str, exps_filename: str,
+                                          persist: bool = True) -> CompiledExplorerScript:
+        """
+        Like compile_explorerscript, but returns the serialized result.
+        If persist is False, the result is not written to the artifact cache.
+        """
+        source_hash = self.source_hash(code)
+        with self._last_compiled_lock:
+            last_compiled, persisted = self._last_compiled.get(exps_filename, (None, False))
+        if last_compiled is not None and last_compiled.is_up_to_date(source_hash):
+            logger.debug(f"{exps_filename}: Unchanged since last compilation.")
+            if persist and not persisted:
+                # Eg. compiled while typing, before saving.
+                self._store_artifact(exps_filename, last_compiled)
+            return last_compiled
+
+        compiled = self._load_artifact(exps_filename, source_hash)
+        persisted = compiled is not None
+        if compiled is None:
+            _compile_state.dependencies = []
+            try:
+                ssb_model, source_map = self._compile(code, exps_filename)
+                dependencies = tuple(dict.fromkeys(_compile_state.dependencies))
+            finally:
+                _compile_state.dependencies = None
+            compiled = CompiledExplorerScript(
+                source_hash, dependencies, FileType.SSB.serialize(ssb_model, self.static_data), source_map.serialize()
+            )
+            if persist:
+                self._store_artifact(exps_filename, compiled)
+                persisted = True
+        with self._last_compiled_lock:
+            self._last_compiled[exps_filename] = compiled, persisted
+        return compiled
+
+    def _store_artifact(self, exps_filename: str, compiled: CompiledExplorerScript):
+        if self.artifact_cache is None:
+            return
+        self.artifact_cache.store(
+            exps_filename, compiled.source_hash, (stamp[0] for stamp in compiled.dependencies),
+            compiled.ssb_bin, compiled.source_map
+        )
+        with self._last_compiled_lock:
+            if self._last_compiled.get(exps_filename, (None, False))[0] is compiled:
+                self._last_compiled[exps_filename] = compiled, True
+
+    def _load_artifact(self, exps_filename: str, source_hash: str) -> CompiledExplorerScript | None:
+        if self.artifact_cache is None:
+            return None
+        artifact = self.artifact_cache.load(exps_filename, source_hash)
+        if artifact is None:
+            return None
+        dependency_paths, ssb_bin, source_map = artifact
+        dependencies = tuple(dependency_stamp(path) for path in dependency_paths)
+        if any(stamp is None for stamp in dependencies):
+            return None
+        logger.debug(f"{exps_filename}: Using cached compilation result.")
+        return CompiledExplorerScript(source_hash, dependencies, ssb_bin, source_map)  # type: ignore
+
+    def _compile(self, code: str, exps_filename: str) -> tuple[Ssb, SourceMap]:
+        base_compiler = _CachingExplorerScriptSsbCompiler(
+            self._performance_progress_list_var_name, self.lookup_paths
+        )
+        try:
+            base_compiler.compile(code, exps_filename)
+        except (SsbCompilerError, ParseError) as e:
+            setattr(e, USER_ERROR_MARK, True)
+            raise e
+
+        assert (
+            base_compiler.routine_infos is not None
+            and base_compiler.routine_ops is not None
+            and base_compiler.named_coroutines is not None
+            and base_compiler.source_map is not None
+        )
+        return self._compiler.compile_structured(
+            base_compiler.routine_infos,
+            base_compiler.routine_ops,
+            base_compiler.named_coroutines,
+            base_compiler.source_map,
+        )
@@ -20,6 +20,7 @@ import os
 from typing import Optional, TYPE_CHECKING
 
 from explorerscript.source_map import SourceMap
+from skytemple_files.common.project_file_manager import ProjectFileManager
 from skytemple_ssb_debugger.model.ssb_files import AbstractScriptFile
 
 
@@ -30,6 +31,13 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def explorerscript_full_path(project_file_manager: ProjectFileManager, ssb_filename: str) -> str:
+    """Returns the absolute path of the ExplorerScript source file of the SSB file."""
+    return os.path.join(
+        project_file_manager.dir(), project_file_manager.explorerscript_get_path_for_ssb(ssb_filename)
+    )
+
+
 class ExplorerScriptFile(AbstractScriptFile):
     def __init__(self, parent: SsbLoadedFile):
         super().__init__(parent)
@@ -40,11 +48,7 @@ class ExplorerScriptFile(AbstractScriptFile):
 
     @property
     def full_path(self):
-        fm = self.parent.project_file_manager
-        project_dir = fm.dir()
-        return os.path.join(
-            project_dir, fm.explorerscript_get_path_for_ssb(self.parent.filename)
-        )
+        return explorerscript_full_path(self.parent.project_file_manager, self.parent.filename)
 
     def load(self, force=False):
         logger.debug(f"ExplorerScript load requested for {self.full_path}.")
@@ -15,6 +15,7 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
+import hashlib
 import logging
 from typing import TYPE_CHECKING, List, Optional
 from collections.abc import Callable
@@ -32,11 +33,17 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def ssb_hash(binary_data: bytes) -> str:
+    return hashlib.sha256(binary_data).hexdigest()
+
+
 class SsbLoadedFile:
     def __init__(self, filename: str, model: Ssb,
                  ssb_file_manager: SsbFileManager | None, project_file_manager: ProjectFileManager):
         self.filename = filename
-        self.ssb_model = model
+        self._ssb_model = model
+        # Hash of the binary data of the model, calculated on first use.
+        self._ssb_hash: str | None = None
         # TODO: we really have to fix this weird coupling. SsbLoadedFile should not need a file manager reference
         #       and the saving of ExplorerScript should not be within the SSBS/EXPS sub models.
         self.file_manager: SsbFileManager | None = ssb_file_manager
@@ -78,6 +85,24 @@ class SsbLoadedFile:
         return None
 
 
+    @property
+    def ssb_model(self) -> Ssb:
+        return self._ssb_model
+
+    @ssb_model.setter
+    def ssb_model(self, value: Ssb):
+        self._ssb_model = value
+        self._ssb_hash = None
+
+    @property
+    def ssb_hash(self) -> str:
+        """
+        Hash of the binary data the SSB model was loaded from. Only calculated again after the model was replaced.
+        """
+        if self._ssb_hash is None:
+            self._ssb_hash = ssb_hash(self._ssb_model.original_binary_data)
+        return self._ssb_hash
+
     @property
     def opened_in_editor(self):
         return self._opened_in_editor
@@ -112,9 +137,23 @@ class SsbLoadedFile:
     @not_breakable.setter
     def not_breakable(self, value):
         self._not_breakable_cache = value
-        emulator_debug_set_loaded_ssb_breakable(self.filename, not value)
+        # Not initialized when running without the debugger, see __init__.
+        if emulator_is_initialized():
+            emulator_debug_set_loaded_ssb_breakable(self.filename, not value)
         self._trigger_property_change('not_breakable', value)
 
+    @property
+    def in_use(self) -> bool:
+        """
+        Whether this model is in use and must be kept loaded: It is open in an editor or the Ground Engine,
+        it's state in RAM is outdated or something listens to it's events.
+        """
+        return (
+            self._opened_in_editor or self._opened_in_ground_engine or not self._ram_state_up_to_date
+            or len(self._event_handlers_manager) > 0 or len(self._event_handlers_editor) > 0
+            or len(self._event_handlers_property_change) > 0
+        )
+
     def register_reload_event_manager(self, on_ssb_reload):
         """Called once, then removed."""
         self._event_handlers_manager.append(on_ssb_reload)
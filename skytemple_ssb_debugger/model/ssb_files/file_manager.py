@@ -15,17 +15,25 @@
 #  You should have received a copy of the GNU General Public License
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
-import hashlib
 import logging
 import os
+from concurrent.futures import Future, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from typing import TYPE_CHECKING, List, Tuple, Set, Optional
+from collections.abc import Callable, Iterable
 
 from explorerscript.included_usage_map import IncludedUsageMap
+from explorerscript.source_map import SourceMap
 from skytemple_files.common.types.file_types import FileType
 from skytemple_files.common.util import open_utf8
-from skytemple_files.script.ssb.script_compiler import ScriptCompiler
+from skytemple_files.script.ssb.model import Ssb
 from skytemple_ssb_debugger.context.abstract import AbstractDebuggerControlContext
-from skytemple_ssb_debugger.model.ssb_files.file import SsbLoadedFile
+from skytemple_ssb_debugger.model.ssb_files import compile_worker
+from skytemple_ssb_debugger.model.ssb_files.artifact_cache import ArtifactCache, ARTIFACT_CACHE_DIR_NAME, \
+    static_data_version
+from skytemple_ssb_debugger.model.ssb_files.compiler_service import ExplorerScriptCompilerService
+from skytemple_ssb_debugger.model.ssb_files.explorerscript import explorerscript_full_path
+from skytemple_ssb_debugger.model.ssb_files.file import SsbLoadedFile, ssb_hash
 
 if TYPE_CHECKING:
     from skytemple_ssb_debugger.controller.debugger import DebuggerController
@@ -36,11 +44,26 @@ logger = logging.getLogger(__name__)
 class SsbFileManager:
     def __init__(self, context: AbstractDebuggerControlContext):
         self.context: AbstractDebuggerControlContext = context
+        self._compiler_service: ExplorerScriptCompilerService | None = None
 
     @property
     def project_fm(self):
         return self.context.get_project_filemanager()
 
+    @property
+    def compiler(self) -> ExplorerScriptCompilerService:
+        """The compiler for the ExplorerScript files of the currently open project."""
+        static_data = self.context.get_static_data()
+        lookup_paths = [self.context.get_project_macro_dir()]
+        service = self._compiler_service
+        if service is None or service.static_data is not static_data or service.lookup_paths != lookup_paths:
+            artifact_cache = ArtifactCache(
+                os.path.join(self.context.get_project_debugger_dir(), ARTIFACT_CACHE_DIR_NAME),
+                static_data_version(static_data)
+            )
+            service = self._compiler_service = ExplorerScriptCompilerService(static_data, lookup_paths, artifact_cache)
+        return service
+
     def get(self, filename: str) -> SsbLoadedFile:
         """Get a file. If loaded by editor or ground engine, use the open_* methods instead!"""
         return self.context.get_ssb(filename, self)
@@ -68,18 +91,22 @@ class SsbFileManager:
         logger.debug(f"{ssb_filename}: Pre-Save")
         project_fm.explorerscript_save(ssb_filename, code, None)
 
+        logger.debug(f"{ssb_filename}: Get SSB")
+        f = self.get(ssb_filename)
+        logger.debug(f"{ssb_filename}: Compile")
+        ssb_model, source_map = self.compiler.compile_explorerscript(code, f.exps.full_path)
+        return self._save_compiled(ssb_filename, code, ssb_model, source_map)
+
+    def _save_compiled(self, ssb_filename: str, code: str,
+                       ssb_model: Ssb, source_map: SourceMap) -> tuple[bool, set[str]]:
+        """Second half of save_from_explorerscript: Updates the model and source map and saves everything."""
+        project_fm = self.context.get_project_filemanager()
         project_dir = self.context.get_project_dir()
         static_data = self.context.get_static_data()
-        logger.debug(f"{ssb_filename}: Init Compiler")
-        compiler = ScriptCompiler(static_data)
-        logger.debug(f"{ssb_filename}: Get SSB")
         f = self.get(ssb_filename)
         exps_filename = f.exps.full_path
         original_source_map = f.exps.source_map
-        logger.debug(f"{ssb_filename}: Compile")
-        f.ssb_model, f.exps.source_map = compiler.compile_explorerscript(
-            code, exps_filename, lookup_paths=[self.context.get_project_macro_dir()]
-        )
+        f.ssb_model, f.exps.source_map = ssb_model, source_map
 
         logger.debug(f"{ssb_filename}: Serialize")
         ssb_new_bin = FileType.SSB.serialize(f.ssb_model, static_data)
@@ -117,35 +144,137 @@ class SsbFileManager:
         return result
 
     def save_explorerscript_macro(self, abs_exps_path: str, code: str,
-                                  changed_ssbs: list[SsbLoadedFile]) -> tuple[list[bool], list[set[str]]]:
+                                  changed_ssbs: list[SsbLoadedFile],
+                                  progress_callback: Callable[[int, int], None] | None = None
+                                  ) -> tuple[list[bool], list[set[str]]]:
         """
         Saves an ExplorerScript macro file. This will save the source file for the macro and also recompile all SSB
         models in the list of changed_ssbs.
         Returned is a list of "ready_to_reload" from save_from_explorerscript and a list of sets for ALL included files
         of those ssb files.
+        The SSB models are saved using save_from_explorerscript_multiple, see there for progress_callback.
         """
         logger.debug(f"{abs_exps_path}: Saving ExplorerScript macro")
         # Write ExplorerScript to file
         with open_utf8(abs_exps_path, 'w') as f:
             f.write(code)
 
-        ready_to_reloads = []
-        included_files_list: list[set[str]] = []
         project_fm = self.context.get_project_filemanager()
+        sources: dict[str, str] = {}
         for ssb in changed_ssbs:
             # Skip non-existing or not up to date exps:
-            if not project_fm.explorerscript_exists(ssb.filename) or \
-                    not project_fm.explorerscript_hash_up_to_date(ssb.filename, ssb.exps.ssb_hash):
-                ready_to_reloads.append(False)
-                included_files_list.append(set())
-            else:
-                exps_source, _ = project_fm.explorerscript_load(ssb.filename, sourcemap=False)
-                ready_to_reload, included_files = self.save_from_explorerscript(ssb.filename, exps_source)
-                ready_to_reloads.append(ready_to_reload)
-                included_files_list.append(included_files)
+            if project_fm.explorerscript_exists(ssb.filename) and \
+                    project_fm.explorerscript_hash_up_to_date(ssb.filename, ssb.exps.ssb_hash):
+                sources[ssb.filename], _ = project_fm.explorerscript_load(ssb.filename, sourcemap=False)
+
+        results = self.save_from_explorerscript_multiple(sources, progress_callback)
+
+        ready_to_reloads = []
+        included_files_list: list[set[str]] = []
+        for ssb in changed_ssbs:
+            ready_to_reload, included_files = results.get(ssb.filename, (False, set()))
+            ready_to_reloads.append(ready_to_reload)
+            included_files_list.append(included_files)
 
         return ready_to_reloads, included_files_list
 
+    def save_from_explorerscript_multiple(self, sources: dict[str, str],
+                                          progress_callback: Callable[[int, int], None] | None = None
+                                          ) -> dict[str, tuple[bool, set[str]]]:
+        """
+        Save multiple SSB models from ExplorerScript, like save_from_explorerscript. sources maps SSB file names
+        to their ExplorerScript source code. Returns the results of save_from_explorerscript for each file.
+
+        The SSB models are compiled in parallel in worker processes and the ROM is only written once at the end.
+        progress_callback is called with the number of compiled models and the total number of models to compile,
+        from the thread this method is called in.
+        """
+        compiled = self._compile_parallel(sources, progress_callback)
+        results = {}
+        with self.context.deferred_rom_save():
+            for ssb_filename, (ssb_model, source_map) in compiled.items():
+                results[ssb_filename] = self._save_compiled(ssb_filename, sources[ssb_filename], ssb_model, source_map)
+        return results
+
+    def rebuild(self, ssb_filenames: Iterable[str],
+                progress_callback: Callable[[int, int], None] | None = None) -> list[str]:
+        """
+        Recompiles all of the given SSB files that have ExplorerScript source files in the project and saves them
+        (see save_from_explorerscript_multiple). The sources are used even if they are not up to date with the SSB
+        files in the ROM. Returns the names of the rebuilt SSB files.
+        """
+        project_fm = self.context.get_project_filemanager()
+        sources: dict[str, str] = {}
+        for ssb_filename in ssb_filenames:
+            if project_fm.explorerscript_exists(ssb_filename):
+                sources[ssb_filename], _ = project_fm.explorerscript_load(ssb_filename, sourcemap=False)
+        self.save_from_explorerscript_multiple(sources, progress_callback)
+        return list(sources.keys())
+
+    def _compile_parallel(self, sources: dict[str, str],
+                          progress_callback: Callable[[int, int], None] | None) -> dict[str, tuple[Ssb, SourceMap]]:
+        """
+        Compiles the ExplorerScript sources of the given SSB files, using a process pool if there is more than one.
+        If a file fails to compile in a worker, the error is raised and the files not yet compiled are skipped.
+        If the worker processes die, the remaining files are compiled in this process.
+        """
+        compiler = self.compiler
+        compiled: dict[str, tuple[Ssb, SourceMap]] = {}
+        # The SSB models are not needed for compiling, so they are not loaded here.
+        project_fm = self.project_fm
+        exps_paths = {
+            ssb_filename: explorerscript_full_path(project_fm, ssb_filename) for ssb_filename in sources.keys()
+        }
+
+        def compile_here(ssb_filename: str) -> tuple[Ssb, SourceMap]:
+            logger.debug(f"{ssb_filename}: Compile")
+            return compiler.compile_explorerscript(sources[ssb_filename], exps_paths[ssb_filename])
+
+        def report_progress():
+            if progress_callback is not None:
+                progress_callback(len(compiled), len(sources))
+
+        report_progress()
+        pool = None
+        futures: dict[Future, str] = {}
+        try:
+            pool = compile_worker.create_compile_pool(compiler, len(sources))
+            if pool is not None:
+                for ssb_filename, code in sources.items():
+                    futures[pool.submit(
+                        compile_worker.compile_explorerscript, code, exps_paths[ssb_filename]
+                    )] = ssb_filename
+        except Exception as err:
+            logger.warning("Could not start compile workers, compiling sequentially.", exc_info=err)
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            pool = None
+        if pool is None:
+            for ssb_filename in sources.keys():
+                compiled[ssb_filename] = compile_here(ssb_filename)
+                report_progress()
+            return compiled
+
+        try:
+            for future in as_completed(futures):
+                ssb_filename = futures[future]
+                try:
+                    ssb_bin, source_map_json = future.result()
+                except BrokenProcessPool as err:
+                    logger.warning(f"{ssb_filename}: Compile worker died, compiling again.", exc_info=err)
+                    compiled[ssb_filename] = compile_here(ssb_filename)
+                else:
+                    compiled[ssb_filename] = (
+                        FileType.SSB.deserialize(ssb_bin, compiler.static_data), SourceMap.deserialize(source_map_json)
+                    )
+                report_progress()
+        except BaseException:
+            # Don't wait for the remaining files, they are not saved anyway.
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+        return compiled
+
     def force_reload(self, filename: str):
         """
         Force a SSB reload event to be triggered. You MUST only call this after one of the save
@@ -155,43 +284,51 @@ class SsbFileManager:
         self.get(filename).signal_editor_reload()
 
     def open_in_editor(self, filename: str):
-        self.get(filename)
+        def pin(f: SsbLoadedFile):
+            f.opened_in_editor = True
+
+        # Marked as opened while it's fetched, so that it can not be unloaded in between.
+        f = self.context.get_ssb_and_pin(filename, self, pin)
         logger.debug(f"{filename}: Opened in editor")
-        self.get(filename).opened_in_editor = True
-        return self.get(filename)
+        return f
 
     def open_in_ground_engine(self, filename: str):
-        self.get(filename)
+        def pin(f: SsbLoadedFile):
+            f.opened_in_ground_engine = True
+
+        # Marked as opened while it's fetched, so that it can not be unloaded in between.
+        f = self.context.get_ssb_and_pin(filename, self, pin)
         logger.debug(f"{filename}: Opened in Ground Engine")
-        self.get(filename).opened_in_ground_engine = True
         # The file was reloaded in RAM:
-        if not self.get(filename).ram_state_up_to_date:
-            self.get(filename).ram_state_up_to_date = True
-            self.get(filename).not_breakable = False
-            self.get(filename).signal_editor_reload()
+        if not f.ram_state_up_to_date:
+            f.ram_state_up_to_date = True
+            f.not_breakable = False
+            f.signal_editor_reload()
 
-        return self.get(filename)
+        return f
 
     def close_in_editor(self, filename: str):
         """
         # - If the file was closed and the old text marks are no longer available, disable
         #   debugging for that file until reload [show warning before close]
         """
-        if not self.get(filename).ram_state_up_to_date:
-            self.get(filename).not_breakable = True
+        f = self.get(filename)
+        if not f.ram_state_up_to_date:
+            f.not_breakable = True
         logger.debug(f"{filename}: Closed in editor")
-        self.get(filename).opened_in_editor = False
+        f.opened_in_editor = False
 
     def close_in_ground_engine(self, filename: str):
         """
         # - If the file is no longer loaded in Ground Engine: Regenerate text marks from source map.
         Is threadsafe.
         """
-        self.get(filename).opened_in_ground_engine = False
-        self.get(filename).not_breakable = False
-        if not self.get(filename).ram_state_up_to_date:
-            self.get(filename).signal_editor_reload()
-        self.get(filename).ram_state_up_to_date = True
+        f = self.get(filename)
+        f.opened_in_ground_engine = False
+        f.not_breakable = False
+        if not f.ram_state_up_to_date:
+            f.signal_editor_reload()
+        f.ram_state_up_to_date = True
         logger.debug(f"{filename}: Closed in Ground Engine")
         pass
 
@@ -215,11 +352,11 @@ class SsbFileManager:
         return False
 
     def hash_for(self, filename: str):
-        return self.hash(self.get(filename).ssb_model.original_binary_data)
+        return self.get(filename).ssb_hash
 
     @staticmethod
     def hash(binary_data: bytes):
-        return hashlib.sha256(binary_data).hexdigest()
+        return ssb_hash(binary_data)
 
     def mark_invalid(self, filename: str):
         """Mark a file as not breakable, because source mappings are not available."""
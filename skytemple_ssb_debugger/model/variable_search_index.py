@@ -0,0 +1,66 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+from collections.abc import Iterable
+
+from skytemple_files.common.ppmdu_config.script_data import Pmd2ScriptGameVar
+
+# Maximum number of queries that are remembered to narrow down following searches.
+MAX_CACHED_QUERIES = 64
+
+
+class VariableSearchIndex:
+    """
+    Search index over the names of game variables.
+
+    Queries are matched case-insensitively as substrings of the variable names. Results of previous queries are
+    remembered, so that a query that extends a previous query (eg. while the user is typing) only has to check the
+    previous results instead of all variables.
+    """
+
+    def __init__(self, variables: Iterable[Pmd2ScriptGameVar]):
+        self._names: dict[int, str] = {var.id: var.name.lower() for var in variables}
+        self._all: frozenset[int] = frozenset(self._names.keys())
+        self._cache: dict[str, frozenset[int]] = {}
+
+    @property
+    def all(self) -> frozenset[int]:
+        """IDs of all indexed variables."""
+        return self._all
+
+    def search(self, query: str) -> frozenset[int]:
+        """Returns the IDs of all variables containing query."""
+        query = query.strip().lower()
+        if query == '':
+            return self._all
+        if query in self._cache:
+            return self._cache[query]
+
+        # Narrow down the search using the most specific previous query contained in this one.
+        candidates = self._all
+        best_match_len = 0
+        for previous_query, previous_result in self._cache.items():
+            if len(previous_query) > best_match_len and previous_query in query:
+                candidates = previous_result
+                best_match_len = len(previous_query)
+
+        result = frozenset(var_id for var_id in candidates if query in self._names[var_id])
+
+        if len(self._cache) >= MAX_CACHED_QUERIES:
+            self._cache.clear()
+        self._cache[query] = result
+        return result
@@ -0,0 +1,137 @@
+#  Copyright 2020-2025 SkyTemple Contributors
+#
+#  This file is part of SkyTemple.
+#
+#  SkyTemple is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SkyTemple is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+import logging
+import re
+
+import enchant
+from gi.repository import GLib, Gtk, GtkSource
+from gtkspellcheck import SpellChecker
+
+logger = logging.getLogger(__name__)
+
+# Number of lines above and below the visible part of the view that are checked as well.
+VIEWPORT_MARGIN_LINES = 50
+# Maximum number of strings the results are cached for.
+MAX_CACHED_STRINGS = 10000
+# Context class of string literals in the ExplorerScript language definition.
+CONTEXT_CLASS_STRING = 'string'
+# Formatting tags in strings, like [CN] or [hero]. These are not checked.
+TAG_PATTERN = re.compile(r'\[[^\]\n]*\]')
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+
+
+class ViewportSpellChecker(SpellChecker):
+    """
+    Spellchecker for the ExplorerScript editor. Unlike the regular SpellChecker, it only checks string literals
+    and the whole buffer is never checked at once: Only the visible part of the view (and VIEWPORT_MARGIN_LINES
+    around it) is checked, in an idle callback after it was scrolled or the dictionary changed.
+    Edited lines are checked right away. The misspelled words of each string are cached, so strings that were already
+    checked (or occur multiple times) don't need to be looked up in the dictionary again.
+    """
+
+    def __init__(self, view: GtkSource.View, language: str):
+        # Set before initializing the spellchecker, since that already requests the first check.
+        # string -> (start, end) of all misspelled words in it
+        self._misspelled_cache: dict[str, list[tuple[int, int]]] = {}
+        self._check_source_id: int | None = None
+        super().__init__(view, language)
+        vadjustment = view.get_vadjustment()
+        if vadjustment is not None:
+            vadjustment.connect('value-changed', self._schedule_viewport_check)
+        view.connect('size-allocate', self._schedule_viewport_check)
+
+    def recheck(self):
+        # Called when the dictionary changed, so the cached results are no longer valid.
+        self._misspelled_cache = {}
+        self._schedule_viewport_check()
+
+    def check_range(self, start: Gtk.TextIter, end: Gtk.TextIter, force_all=False):
+        """Checks all strings in the lines between start and end."""
+        if not self._enabled:
+            return
+        buffer: GtkSource.Buffer = self._buffer
+        start = start.copy()
+        start.set_line_offset(0)
+        end = end.copy()
+        if not end.ends_line():
+            end.forward_to_line_end()
+        # Strings are only known once the lines were highlighted.
+        buffer.ensure_highlight(start, end)
+        buffer.remove_tag(self._misspelled, start, end)
+        self._deferred_check = False
+        cursor = buffer.get_iter_at_mark(buffer.get_insert())
+
+        i = start.copy()
+        if not buffer.iter_has_context_class(i, CONTEXT_CLASS_STRING):
+            if not buffer.iter_forward_to_context_class_toggle(i, CONTEXT_CLASS_STRING):
+                return
+        while i.compare(end) < 0:
+            string_start = i.copy()
+            buffer.iter_forward_to_context_class_toggle(i, CONTEXT_CLASS_STRING)
+            self._check_string(string_start, i, cursor, force_all)
+            if not buffer.iter_forward_to_context_class_toggle(i, CONTEXT_CLASS_STRING):
+                break
+
+    def _check_string(self, start: Gtk.TextIter, end: Gtk.TextIter, cursor: Gtk.TextIter, force_all: bool):
+        text = start.get_text(end)
+        misspelled = self._misspelled_cache.get(text)
+        if misspelled is None:
+            misspelled = self._find_misspelled(text)
+            if len(self._misspelled_cache) >= MAX_CACHED_STRINGS:
+                self._misspelled_cache = {}
+            self._misspelled_cache[text] = misspelled
+        offset = start.get_offset()
+        for word_start, word_end in misspelled:
+            word_start_iter = self._buffer.get_iter_at_offset(offset + word_start)
+            word_end_iter = self._buffer.get_iter_at_offset(offset + word_end)
+            if not force_all and word_start_iter.compare(cursor) < 0 and cursor.compare(word_end_iter) <= 0:
+                # The word is still being typed, it's checked again once the cursor left it.
+                self._deferred_check = True
+                continue
+            self._buffer.apply_tag(self._misspelled, word_start_iter, word_end_iter)
+
+    def _find_misspelled(self, text: str) -> list[tuple[int, int]]:
+        text = TAG_PATTERN.sub(lambda match: ' ' * len(match.group()), text)
+        misspelled = []
+        for match in WORD_PATTERN.finditer(text):
+            try:
+                if not self._dictionary.check(match.group()):
+                    misspelled.append(match.span())
+            except enchant.Error as err:
+                logger.warning(f"Failed checking word {match.group()}: {err}")
+        return misspelled
+
+    def _schedule_viewport_check(self, *args):
+        if self._check_source_id is None:
+            self._check_source_id = GLib.idle_add(self._check_viewport)
+
+    def _check_viewport(self):
+        self._check_source_id = None
+        if not self._enabled:
+            return False
+        view: GtkSource.View = self._view
+        buffer: GtkSource.Buffer = self._buffer
+        rect = view.get_visible_rect()
+        first_visible, _ = view.get_line_at_y(rect.y)
+        last_visible, _ = view.get_line_at_y(rect.y + rect.height)
+        start = buffer.get_iter_at_line(max(0, first_visible.get_line() - VIEWPORT_MARGIN_LINES))
+        end = buffer.get_iter_at_line(
+            min(buffer.get_line_count() - 1, last_visible.get_line() + VIEWPORT_MARGIN_LINES)
+        )
+        self.check_range(start, end, True)
+        return False
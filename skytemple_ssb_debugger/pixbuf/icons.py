@@ -16,12 +16,19 @@
 #  along with SkyTemple.  If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 import math
+from collections.abc import Callable
 
 import cairo
-from gi.repository import Gdk
+from gi.repository import Gdk, GdkPixbuf
 
 from skytemple_ssb_debugger.controller.debug_overlay import COLOR_ACTOR, COLOR_OBJECTS, COLOR_PERFORMER
 
+# Slot IDs the line icons are pre-rendered for, for actors, objects and performers (type IDs 3-5).
+PREWARM_SLOT_IDS = range(0, 16)
+
+# (icon function, type id, slot id, icon theme name, scale factor) -> icon
+_line_icon_cache: dict[tuple[Callable, int, int, str, int], GdkPixbuf.Pixbuf] = {}
+
 
 def create_breakpoint_icon():
     w = h = 24
@@ -106,3 +113,31 @@ def _common_line_icons(cr, type_id, slot_id, icon_actor, icon_object, icon_perfo
                             cairo.FONT_WEIGHT_NORMAL)
         cr.set_font_size(12)
         cr.show_text(str(slot_id))
+
+
+def get_line_icon(create_icon: Callable, type_id: int, slot_id: int, theme_name: str, scale: int,
+                  icon_actor, icon_object, icon_performer, icon_gs) -> GdkPixbuf.Pixbuf:
+    """
+    Returns the icon created by create_icon (create_breaked_line_icon or create_execution_line_icon) for the
+    type and slot. Icons are only rendered once per process, for each icon theme and scale factor.
+    The type icons must be the ones of the given icon theme and scale factor.
+    """
+    key = (create_icon, type_id, slot_id, theme_name, scale)
+    icon = _line_icon_cache.get(key)
+    if icon is None:
+        icon = create_icon(type_id, slot_id, icon_actor, icon_object, icon_performer, icon_gs)
+        _line_icon_cache[key] = icon
+    return icon
+
+
+def prewarm_line_icons(theme_name: str, scale: int, icon_actor, icon_object, icon_performer, icon_gs):
+    """Renders the line icons for the most common types and slots, so that they are ready when needed."""
+    for create_icon in (create_breaked_line_icon, create_execution_line_icon):
+        get_line_icon(create_icon, -1, -1, theme_name, scale, icon_actor, icon_object, icon_performer, icon_gs)
+        get_line_icon(create_icon, 1, 0, theme_name, scale, icon_actor, icon_object, icon_performer, icon_gs)
+        for type_id in (3, 4, 5):
+            for slot_id in PREWARM_SLOT_IDS:
+                get_line_icon(
+                    create_icon, type_id, slot_id, theme_name, scale,
+                    icon_actor, icon_object, icon_performer, icon_gs
+                )
@@ -66,6 +66,11 @@ def create_tree_view_column(
     return column
 
 
+def resizable(column: Gtk.TreeViewColumn) -> Gtk.TreeViewColumn:
+    column.set_resizable(True)
+    return column
+
+
 def get_debugger_version():
     try:
         return importlib_metadata.metadata("skytemple_ssb_debugger")["version"]